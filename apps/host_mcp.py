@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os
-import time
+import signal
+import threading
 from typing import Any, Optional
 
 from core.services import Service
@@ -45,6 +46,7 @@ class HostMcpService(Service):
         self._rest_server: Optional[Any] = None
         self._runtime: Optional[RuntimeLoops] = None
         self._planner_server: Optional[Any] = None
+        self._stop_event = threading.Event()
 
         # services
         self.stt: Optional[SttService] = None
@@ -128,15 +130,17 @@ class HostMcpService(Service):
         if self.cfg.planner.enabled:
             self._planner_server = start_planner_service(host=self.cfg.planner.host, port=self.cfg.planner.port)
 
+        # signal handlers can only be installed from the main thread
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, lambda *_: self._stop_event.set())
+            signal.signal(signal.SIGTERM, lambda *_: self._stop_event.set())
         try:
-            while True:
-                time.sleep(0.5)
-        except KeyboardInterrupt:
-            pass
+            self._stop_event.wait()
         finally:
             self.stop()
 
     def stop(self) -> None:
+        self._stop_event.set()
         if self._runtime:
             self._runtime.stop()
             self._runtime = None
@@ -162,3 +166,15 @@ class HostMcpService(Service):
                 self.stt.stop_listening()
             except Exception:
                 pass
+
+        if self.mcp_executor:
+            try:
+                self.mcp_executor.close()
+            except Exception:
+                pass
+
+        if self.kb_store:
+            try:
+                self.kb_store.flush()
+            except Exception:
+                pass
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
+
+
+def _as_provider(dep: Any) -> Callable[[], Any]:
+    """
+    Services may be passed directly or as zero-arg providers (lazy construction).
+    """
+    if dep is not None and callable(dep):
+        return dep
+    return lambda: dep
 
 
 def register_routes(
@@ -17,6 +26,10 @@ def register_routes(
     event_state=None,
 ) -> None:
 
+    get_stt = _as_provider(stt_service)
+    get_kb = _as_provider(kb_service)
+    get_kb_ingest = _as_provider(kb_ingest)
+
     def _log(kind: str, **data: Any) -> None:
         if event_state is not None:
             try:
@@ -35,54 +48,61 @@ def register_routes(
         }
     
     def stt_start(payload: Dict[str, Any]) -> Dict[str, Any]:
-        if stt_service is None:
+        stt = get_stt()
+        if stt is None:
             return {"ok": False, "error": "stt service not configured"}
-        resp = stt_service.start_listening()
+        resp = stt.start_listening()
         _log("rest_stt_start", ok=bool(resp.get("ok")))
         return resp
 
     def stt_stop(payload: Dict[str, Any]) -> Dict[str, Any]:
-        if stt_service is None:
+        stt = get_stt()
+        if stt is None:
             return {"ok": False, "error": "stt service not configured"}
-        resp = stt_service.stop_listening()
+        resp = stt.stop_listening()
         _log("rest_stt_stop", ok=bool(resp.get("ok")))
         return resp
 
     def stt_latest(payload: Dict[str, Any]) -> Dict[str, Any]:
-        if stt_service is None:
+        stt = get_stt()
+        if stt is None:
             return {"ok": False, "error": "stt service not configured"}
-        return stt_service.latest()
+        return stt.latest()
 
     def stt_push_text(payload: Dict[str, Any]) -> Dict[str, Any]:
-        if stt_service is None:
+        stt = get_stt()
+        if stt is None:
             return {"ok": False, "error": "stt service not configured"}
         text = (payload or {}).get("text", "")
-        resp = stt_service.push_text(text)
+        resp = stt.push_text(text)
         _log("rest_stt_push_text", ok=bool(resp.get("ok")), text=text)
         return resp
 
     def kb_query(payload: Dict[str, Any]) -> Dict[str, Any]:
-        if kb_service is None:
+        kb = get_kb()
+        if kb is None:
             return {"ok": False, "error": "kb service not configured"}
         kind = (payload or {}).get("kind", "object")
         q = (payload or {}).get("q", "")
         top_k = int((payload or {}).get("top_k", 1))
         min_score = float((payload or {}).get("min_score", 0.55))
-        return kb_service.query(kind=kind, q=q, top_k=top_k, min_score=min_score)
+        return kb.query(kind=kind, q=q, top_k=top_k, min_score=min_score)
 
     def kb_last_seen(payload: Dict[str, Any]) -> Dict[str, Any]:
-        if kb_service is None:
+        kb = get_kb()
+        if kb is None:
             return {"ok": False, "error": "kb service not configured"}
         kind = (payload or {}).get("kind", "object")
         label = (payload or {}).get("label", "")
-        return kb_service.last_seen(kind=kind, label=label)
+        return kb.last_seen(kind=kind, label=label)
 
     def kb_list_entities(payload: Dict[str, Any]) -> Dict[str, Any]:
-        if kb_service is None:
+        kb = get_kb()
+        if kb is None:
             return {"ok": False, "error": "kb service not configured"}
         kind = (payload or {}).get("kind")
         limit = int((payload or {}).get("limit", 200))
-        return {"ok": True, "entities": kb_service.store.list_entities(kind=kind, limit=limit)}
+        return {"ok": True, "entities": kb.store.list_entities(kind=kind, limit=limit)}
 
     def kb_ingest_snapshot(payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -94,10 +114,11 @@ def register_routes(
           "face":  { "ts": <timestamp>, "faces": [ { "label"|"name"|"person": "...", "sim"|"score"|"conf": 0.7, "bbox": [...]? }, ... ] }
         }
         """
-        if kb_ingest is None:
+        ingest = get_kb_ingest()
+        if ingest is None:
             return {"ok": False, "error": "kb ingest service not configured"}
         snap = payload or {}
-        return kb_ingest.ingest_snapshot(snap)
+        return ingest.ingest_snapshot(snap)
 
     def notify(payload: Dict[str, Any]) -> Dict[str, Any]:
         text = str((payload or {}).get("text", "")).strip()
@@ -118,10 +139,11 @@ def register_routes(
     def planner_plan_from_stt(payload: Dict[str, Any]) -> Dict[str, Any]:
         if planner_client is None:
             return {"ok": False, "error": "planner client not configured"}
-        if stt_service is None:
+        stt = get_stt()
+        if stt is None:
             return {"ok": False, "error": "stt service not configured"}
 
-        snap = stt_service.latest()
+        snap = stt.latest()
         final_text = (snap.get("final") or "").strip()
         fallback = bool((payload or {}).get("fallback_to_partial", False))
         if not final_text and fallback:
@@ -157,9 +179,10 @@ def register_routes(
         use_stt = bool((payload or {}).get("use_stt", True))
 
         if not text and use_stt:
-            if stt_service is None:
+            stt = get_stt()
+            if stt is None:
                 return {"ok": False, "error": "stt not configured and no text provided"}
-            snap = stt_service.latest()
+            snap = stt.latest()
             text = (snap.get("final") or "").strip()
 
         if not text:
@@ -168,8 +191,9 @@ def register_routes(
         context = (payload or {}).get("context") or {}
 
         try:
-            if kb_service is not None:
-                people = kb_service.store.list_entities(kind="person", limit=50)
+            kb = get_kb()
+            if kb is not None:
+                people = kb.store.list_entities(kind="person", limit=50)
                 context.setdefault("known_people", [p.get("label") for p in people if p.get("label")])
         except Exception:
             pass
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from functools import cached_property
 from typing import Any, Optional
 
 from routes.rest_api import CommandRegistry, start_rest_server
@@ -32,28 +32,74 @@ from .api.safety import ToolSafetyPolicy, make_safe_tool_invoker, compute_allow_
 from .llm.planner_service import start_planner_service
 
 
-@dataclass
 class McpContainer:
-    cfg: McpAppConfig
-
-    registry: CommandRegistry
-    rest_server: Optional[Any] = None
-    planner_http_server: Optional[Any] = None
-    runtime: Optional[RuntimeLoops] = None
-
-    stt: Optional[SttService] = None
-    embed_cache: Optional[SqliteEmbeddingCache] = None
-    embedder: Optional[GeminiEmbedder] = None
-
-    kb_store: Optional[KbStore] = None
-    kb: Optional[KbService] = None
-    kb_ingest: Optional[KbIngestService] = None
+    """
+    Heavy services (SQLite stores, embedder, STT) are built on first access
+    via cached_property, so startup only pays for what is actually used.
+    STT is the exception: start() builds it so its model preload begins early.
+    """
+
+    def __init__(self, cfg: McpAppConfig, registry: CommandRegistry):
+        self.cfg = cfg
+        self.registry = registry
+
+        self.rest_server: Optional[Any] = None
+        self.planner_http_server: Optional[Any] = None
+        self.runtime: Optional[RuntimeLoops] = None
+
+        self.planner_client: Optional[PlannerClient] = None
+
+        self.mcp_store: Optional[McpRunStore] = None
+        self.mcp_executor: Optional[McpExecutor] = None
+        self.mcp_service: Optional[McpService] = None
+
+    @cached_property
+    def stt(self) -> Optional[SttService]:
+        if not self.cfg.stt.enabled:
+            return None
+        return SttService(
+            model_path=self.cfg.stt.model_path or None,
+            sample_rate=self.cfg.stt.sample_rate,
+            device=self.cfg.stt.device,
+            phrase_timeout_s=self.cfg.stt.phrase_timeout_s,
+        )
 
-    planner_client: Optional[PlannerClient] = None
+    @cached_property
+    def embed_cache(self) -> Optional[SqliteEmbeddingCache]:
+        if not self.cfg.embeddings.enabled:
+            return None
+        return SqliteEmbeddingCache(self.cfg.embeddings.sqlite_path)
+
+    @cached_property
+    def embedder(self) -> Optional[GeminiEmbedder]:
+        if self.embed_cache is None:
+            return None
+        return GeminiEmbedder(self.embed_cache)
+
+    @cached_property
+    def kb_store(self) -> Optional[KbStore]:
+        if not self.cfg.kb.enabled:
+            return None
+        return KbStore(db_path=self.cfg.kb.sqlite_path)
+
+    @cached_property
+    def kb(self) -> Optional[KbService]:
+        if self.kb_store is None:
+            return None
+        return KbService(store=self.kb_store, embedder=self.embedder)
+
+    @cached_property
+    def kb_ingest(self) -> Optional[KbIngestService]:
+        if self.kb is None:
+            return None
+        return KbIngestService(
+            kb_service=self.kb,
+            snapshot_provider=VisualStateStore.snapshot,
+            interval_s=self.cfg.kb.ingest_interval_s,
+        )
 
-    mcp_store: Optional[McpRunStore] = None
-    mcp_executor: Optional[McpExecutor] = None
-    mcp_service: Optional[McpService] = None
+    def _is_built(self, name: str) -> bool:
+        return name in self.__dict__
 
     @staticmethod
     def build(cfg: McpAppConfig) -> "McpContainer":
@@ -63,27 +109,6 @@ class McpContainer:
         registry = CommandRegistry()
         c = McpContainer(cfg=cfg, registry=registry)
 
-        if cfg.stt.enabled:
-            c.stt = SttService(
-                model_path=cfg.stt.model_path or None,
-                sample_rate=cfg.stt.sample_rate,
-                device=cfg.stt.device,
-                phrase_timeout_s=cfg.stt.phrase_timeout_s,
-            )
-
-        if cfg.embeddings.enabled:
-            c.embed_cache = SqliteEmbeddingCache(cfg.embeddings.sqlite_path)
-            c.embedder = GeminiEmbedder(c.embed_cache)
-
-        if cfg.kb.enabled:
-            c.kb_store = KbStore(db_path=cfg.kb.sqlite_path)
-            c.kb = KbService(store=c.kb_store, embedder=c.embedder)
-            c.kb_ingest = KbIngestService(
-                kb_service=c.kb,
-                snapshot_provider=VisualStateStore.snapshot,
-                interval_s=cfg.kb.ingest_interval_s,
-            )
-
         c.planner_client = PlannerClient()
 
         register_tool_handlers(registry)
@@ -98,11 +123,12 @@ class McpContainer:
         )
         c.mcp_service = McpService(store=c.mcp_store, executor=c.mcp_executor, planner=c.planner_client)
 
+        # Lazy services are handed over as providers; None keeps "not configured" semantics.
         register_routes(
             registry,
-            stt_service=c.stt,
-            kb_service=c.kb,
-            kb_ingest=c.kb_ingest,
+            stt_service=(lambda: c.stt) if cfg.stt.enabled else None,
+            kb_service=(lambda: c.kb) if cfg.kb.enabled else None,
+            kb_ingest=(lambda: c.kb_ingest) if cfg.kb.enabled else None,
             planner_client=c.planner_client,
             mcp_service=c.mcp_service,
             mcp_store=c.mcp_store,
@@ -119,6 +145,11 @@ class McpContainer:
         return c
 
     def start(self) -> None:
+        # Build STT now so its background model preload starts at process start,
+        # not on the first /stt/start (which would then block on the load).
+        if self.cfg.stt.enabled:
+            _ = self.stt
+
         if self.cfg.planner.enabled:
             self.planner_http_server = start_planner_service(
                 host=self.cfg.planner.host,
@@ -156,9 +187,22 @@ class McpContainer:
                 pass
             self.planner_http_server = None
 
-        # Stop STT
-        if self.stt:
+        # Stop STT (only if it was ever built)
+        if self._is_built("stt") and self.stt:
             try:
                 self.stt.stop_listening()
             except Exception:
                 pass
+
+        if self.mcp_executor:
+            try:
+                self.mcp_executor.close()
+            except Exception:
+                pass
+
+        # Write out queued KB observations
+        if self._is_built("kb_store") and self.kb_store:
+            try:
+                self.kb_store.flush()
+            except Exception:
+                pass
@@ -2,13 +2,63 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+
 from .sqlite_cache import SqliteEmbeddingCache
 
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    httpx = None
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    if not data:
+        return {}
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# One pooled client shared by all embedders; HTTP/2 multiplexes concurrent
+# embed calls over a single TLS session when the `h2` extra is installed.
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> Optional[Any]:
+    global _client
+    if httpx is None:
+        return None
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            limits = httpx.Limits(max_connections=8, max_keepalive_connections=8)
+            try:
+                _client = httpx.Client(http2=True, limits=limits)
+            except ImportError:
+                # h2 not installed: keep pooling over HTTP/1.1
+                _client = httpx.Client(limits=limits)
+    return _client
+
+
 @dataclass(frozen=True)
 class GeminiEmbedderConfig:
     api_key: str
@@ -20,6 +70,7 @@ class GeminiEmbedderConfig:
 class GeminiEmbedder:
     """
       POST {base_url}/models/{model}:embedContent?key=...
+      POST {base_url}/models/{model}:batchEmbedContents?key=...
     """
 
     def __init__(self, cache: SqliteEmbeddingCache, cfg: Optional[GeminiEmbedderConfig] = None):
@@ -35,10 +86,13 @@ class GeminiEmbedder:
         self.cfg = cfg
         self.cache = cache
 
-    def embed(self, text: str) -> List[float]:
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Returns a float32 vector; empty (size 0) when there is nothing to embed.
+        """
         text = (text or "").strip()
         if not text:
-            return []
+            return np.empty(0, dtype=np.float32)
 
         cached = self.cache.get(self.cfg.model, text)
         if cached is not None:
@@ -48,27 +102,98 @@ class GeminiEmbedder:
         self.cache.put(self.cfg.model, text, vec)
         return vec
 
-    def _embed_remote(self, text: str) -> List[float]:
+    def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Like embed() for each text, but all cache misses go out in one batch request.
+        """
+        texts = [(t or "").strip() for t in texts]
+        out: List[np.ndarray] = [np.empty(0, dtype=np.float32)] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            cached = self.cache.get(self.cfg.model, text)
+            if cached is not None:
+                out[i] = cached
+            else:
+                missing.setdefault(text, []).append(i)
+
+        if missing:
+            pending = list(missing)
+            vecs = self._embed_remote_batch(pending)
+            for text, vec in zip(pending, vecs):
+                self.cache.put(self.cfg.model, text, vec)
+                for i in missing[text]:
+                    out[i] = vec
+        return out
+
+    def _embed_remote(self, text: str) -> np.ndarray:
         url = f"{self.cfg.base_url}/models/{self.cfg.model}:embedContent?key={self.cfg.api_key}"
         payload: Dict[str, Any] = {
             "content": {"parts": [{"text": text}]}
         }
-        data = json.dumps(payload).encode("utf-8")
+        obj = self._post(url, payload)
+
+        # Expected: { "embedding": { "values": [...] } }
+        emb = obj.get("embedding") or {}
+        values = emb.get("values")
+        if not isinstance(values, list):
+            raise RuntimeError(f"Unexpected embed response: {obj}")
+        return np.asarray(values, dtype=np.float32)
+
+    def _embed_remote_batch(self, texts: List[str]) -> List[np.ndarray]:
+        url = f"{self.cfg.base_url}/models/{self.cfg.model}:batchEmbedContents?key={self.cfg.api_key}"
+        payload: Dict[str, Any] = {
+            "requests": [
+                {"model": f"models/{self.cfg.model}", "content": {"parts": [{"text": t}]}}
+                for t in texts
+            ]
+        }
+        obj = self._post(url, payload)
+
+        # Expected: { "embeddings": [ { "values": [...] }, ... ] } in request order
+        embs = obj.get("embeddings")
+        if not isinstance(embs, list) or len(embs) != len(texts):
+            raise RuntimeError(f"Unexpected batch embed response: {obj}")
+        out: List[np.ndarray] = []
+        for emb in embs:
+            values = (emb or {}).get("values")
+            if not isinstance(values, list):
+                raise RuntimeError(f"Unexpected batch embed response: {obj}")
+            out.append(np.asarray(values, dtype=np.float32))
+        return out
+
+    def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        client = _get_client()
+        if client is not None:
+            return self._post_httpx(client, url, payload)
+        return self._post_urllib(url, payload)
+
+    def _post_httpx(self, client: Any, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            resp = client.post(
+                url,
+                content=_dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=self.cfg.timeout_s,
+            )
+        except Exception as exc:
+            raise RuntimeError(f"Gemini embed request failed: {exc}") from exc
+        if resp.status_code >= 400:
+            raise RuntimeError(f"Gemini embed HTTP {resp.status_code}: {resp.text or resp.reason_phrase}")
+        return _loads(resp.content)
+
+    def _post_urllib(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        data = _dumps(payload)
         req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
 
         try:
             with urllib.request.urlopen(req, timeout=self.cfg.timeout_s) as resp:
-                body = resp.read().decode(resp.headers.get_content_charset() or "utf-8", errors="replace")
+                body = resp.read()
         except urllib.error.HTTPError as exc:
             detail = exc.read().decode("utf-8", errors="ignore")
             raise RuntimeError(f"Gemini embed HTTP {exc.code}: {detail or exc.reason}") from exc
         except Exception as exc:
             raise RuntimeError(f"Gemini embed request failed: {exc}") from exc
 
-        obj = json.loads(body or "{}")
-        # Expected: { "embedding": { "values": [...] } }
-        emb = obj.get("embedding") or {}
-        values = emb.get("values")
-        if not isinstance(values, list):
-            raise RuntimeError(f"Unexpected embed response: {obj}")
-        return [float(x) for x in values]
+        return _loads(body)
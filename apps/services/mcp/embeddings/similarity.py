@@ -1,19 +1,66 @@
 from __future__ import annotations
 
-import math
-from typing import List
+from typing import Optional, Sequence, Union
 
+import numpy as np
 
-def cosine_similarity(a: List[float], b: List[float]) -> float:
-    if not a or not b or len(a) != len(b):
+Vector = Union[np.ndarray, Sequence[float]]
+
+try:
+    import simsimd  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    simsimd = None
+
+
+def cosine_similarity(a: Vector, b: Vector) -> float:
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    if a.size == 0 or b.size == 0 or a.shape != b.shape:
         return 0.0
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-    for x, y in zip(a, b):
-        dot += x * y
-        na += x * x
-        nb += y * y
+    na = float(np.linalg.norm(a))
+    nb = float(np.linalg.norm(b))
     if na <= 0.0 or nb <= 0.0:
         return 0.0
-    return dot / (math.sqrt(na) * math.sqrt(nb))
+    return float(np.dot(a, b)) / (na * nb)
+
+
+def cosine_similarity_batch(m: np.ndarray, q: Vector, row_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Cosine similarity of q against every row of m (N, D) in one matmul.
+    Rows (or a query) with zero norm score 0.0.
+    """
+    q = np.asarray(q, dtype=np.float32)
+    if m.ndim != 2 or m.shape[0] == 0 or q.size == 0 or m.shape[1] != q.shape[0]:
+        return np.zeros(m.shape[0] if m.ndim == 2 else 0, dtype=np.float32)
+    if row_norms is None:
+        row_norms = np.sqrt(np.einsum("ij,ij->i", m, m))
+    q_norm = float(np.sqrt(np.vdot(q, q)))
+    if q_norm <= 0.0:
+        return np.zeros(m.shape[0], dtype=np.float32)
+    if simsimd is not None:
+        # Runtime-dispatched SIMD kernel; it returns cosine *distance*.
+        dist = simsimd.cdist(q.astype(m.dtype, copy=False)[None, :], np.ascontiguousarray(m), metric="cosine")
+        sims = 1.0 - np.asarray(dist, dtype=np.float32)[0]
+        sims[row_norms <= 0.0] = 0.0
+        return sims
+    denom = row_norms * q_norm
+    dots = m @ q
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0.0)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first; only the top k get sorted.
+    """
+    n = scores.shape[0]
+    k = min(max(1, int(k)), n)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k == 1:
+        # Common query case (top_k=1): a single argmax pass, first max wins like the stable sort.
+        return np.array([int(np.argmax(scores))], dtype=np.intp)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
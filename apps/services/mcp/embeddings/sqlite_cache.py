@@ -1,23 +1,68 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import math
 import sqlite3
 import threading
 import time
 import os
-from typing import List, Optional
+from typing import List, Optional, Union
+
+import numpy as np
+
+
+class _BloomFilter:
+    """
+    Minimal bytearray-backed Bloom filter (double hashing over one blake2b digest).
+    Only answers "definitely absent" vs "maybe present".
+    """
+
+    def __init__(self, capacity: int = 1_000_000, fp_rate: float = 0.001):
+        n = max(1, int(capacity))
+        m = int(math.ceil(-n * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_bits = m
+        self.num_hashes = max(1, int(round(m / n * math.log(2))))
+        self._bits = bytearray((m + 7) // 8)
+
+    def _positions(self, *parts: str):
+        h = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            h.update(part.encode("utf-8"))
+            h.update(b"\x00")
+        digest = h.digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, *parts: str) -> None:
+        for pos in self._positions(*parts):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, *parts: str) -> bool:
+        for pos in self._positions(*parts):
+            if not self._bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
 
 
 class SqliteEmbeddingCache:
     """
     Persistent on-disk cache:
-      key = f"{model}:{text}"
-      value = embedding vector (json list[float])
+      key = (model, text)  -- composite primary key, WITHOUT ROWID
+      value = embedding vector (raw float32 BLOB, returned as float32 ndarray)
+
+    Stored keys are mirrored in a Bloom filter so never-seen keys skip SQL.
     """
 
     def __init__(self, db_path: str):
         self.db_path = db_path
         self._lock = threading.Lock()
+        self._bloom = _BloomFilter()
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
@@ -34,55 +79,75 @@ class SqliteEmbeddingCache:
         with self._lock:
             conn = self._connect()
             try:
+                cols = {r[1] for r in conn.execute("PRAGMA table_info(embedding_cache)")}
+                if "key" in cols:
+                    # Legacy layout: key TEXT PRIMARY KEY + vec_json; migrate below.
+                    conn.execute("ALTER TABLE embedding_cache RENAME TO embedding_cache_legacy")
+                    conn.execute("DROP INDEX IF EXISTS idx_embedding_model")
+
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS embedding_cache (
-                        key TEXT PRIMARY KEY,
                         model TEXT NOT NULL,
                         text TEXT NOT NULL,
-                        vec_json TEXT NOT NULL,
-                        ts REAL NOT NULL
-                    )
+                        vec BLOB NOT NULL,
+                        ts REAL NOT NULL,
+                        PRIMARY KEY(model, text)
+                    ) WITHOUT ROWID
                     """
                 )
-                conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_model ON embedding_cache(model)")
+
+                if "key" in cols:
+                    rows = conn.execute("SELECT model, text, vec_json, ts FROM embedding_cache_legacy").fetchall()
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embedding_cache(model, text, vec, ts) VALUES(?,?,?,?)",
+                        (
+                            (m, t, np.asarray(json.loads(v), dtype=np.float32).tobytes(), ts)
+                            for m, t, v, ts in rows
+                        ),
+                    )
+                    conn.execute("DROP TABLE embedding_cache_legacy")
+
                 conn.commit()
+                for model, text in conn.execute("SELECT model, text FROM embedding_cache"):
+                    self._bloom.add(model, text)
             finally:
                 conn.close()
 
-    def get(self, model: str, text: str) -> Optional[List[float]]:
-        key = f"{model}:{text}"
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        if not self._bloom.might_contain(model, text):
+            return None
         with self._lock:
             conn = self._connect()
             try:
                 row = conn.execute(
-                    "SELECT vec_json FROM embedding_cache WHERE key=?",
-                    (key,),
+                    "SELECT vec FROM embedding_cache WHERE model=? AND text=?",
+                    (model, text),
                 ).fetchone()
                 if not row:
                     return None
-                return json.loads(row[0])
+                return np.frombuffer(row[0], dtype=np.float32)
             finally:
                 conn.close()
 
-    def put(self, model: str, text: str, vec: List[float]) -> None:
-        key = f"{model}:{text}"
-        vec_json = json.dumps(vec)
+    def put(self, model: str, text: str, vec: Union[np.ndarray, List[float]]) -> None:
+        blob = np.asarray(vec, dtype=np.float32).tobytes()
         now = time.time()
         with self._lock:
             conn = self._connect()
             try:
                 conn.execute(
                     """
-                    INSERT INTO embedding_cache(key, model, text, vec_json, ts)
-                    VALUES(?,?,?,?,?)
-                    ON CONFLICT(key) DO UPDATE SET
-                      vec_json=excluded.vec_json,
+                    INSERT INTO embedding_cache(model, text, vec, ts)
+                    VALUES(?,?,?,?)
+                    ON CONFLICT(model, text) DO UPDATE SET
+                      vec=excluded.vec,
                       ts=excluded.ts
                     """,
-                    (key, model, text, vec_json, now),
+                    (model, text, blob, now),
                 )
                 conn.commit()
+                self._bloom.add(model, text)
             finally:
                 conn.close()
 
@@ -92,5 +157,6 @@ class SqliteEmbeddingCache:
             try:
                 conn.execute("DELETE FROM embedding_cache")
                 conn.commit()
+                self._bloom.clear()
             finally:
                 conn.close()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import os
 import time
 from dataclasses import asdict, dataclass, is_dataclass
@@ -7,10 +8,25 @@ from typing import Any, Callable, Dict, Optional, Tuple, List
 
 from .kb_service import KbService
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
 
 SnapshotProvider = Callable[[], Dict[str, Any]]
 
 
+def _debug_enabled() -> bool:
+    return str(os.environ.get("KB_INGEST_DEBUG", "0")).strip() == "1"
+
+
+def _debug_dump(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, default=str)
+
+
 @dataclass
 class IngestStats:
     ok: bool
@@ -44,6 +60,23 @@ class KbIngestService:
         self._last_detic_ts: float = 0.0
         self._last_face_ts: float = 0.0
 
+        # (kind, label) -> last ingested ts; filters repeats before they reach SQLite
+        self._recent: Dict[Tuple[str, str], float] = {}
+        self._recent_max = 4096
+
+    def _seen_recently(self, kind: str, label: str, ts: float) -> bool:
+        last_ts = self._recent.get((kind, label))
+        return last_ts is not None and (ts - last_ts) < self.dedup_window_s
+
+    def _mark_ingested(self, kind: str, label: str, ts: float) -> None:
+        # Only called after a successful ingest, so a failed one is retried next time.
+        key = (kind, label)
+        self._recent.pop(key, None)
+        self._recent[key] = ts
+        # evict oldest entries (dicts keep insertion order)
+        while len(self._recent) > self._recent_max:
+            del self._recent[next(iter(self._recent))]
+
     def _to_dict(self, obj: Any) -> Dict[str, Any]:
         if obj is None:
             return {}
@@ -63,15 +96,17 @@ class KbIngestService:
 
     def ingest_snapshot(self, snap: Dict[str, Any], *, stats: Optional[IngestStats] = None) -> Dict[str, Any]:
         stats = stats or IngestStats(ok=True)
+        debug = _debug_enabled()
 
-        try:
-            if str(os.environ.get("KB_INGEST_DEBUG", "0")).strip() == "1":
+        if debug:
+            try:
                 keys = list(snap.keys()) if isinstance(snap, dict) else []
-                print(f"[kb_ingest] snapshot keys={keys} raw={snap}")
-        except Exception:
-            pass
+                print(f"[kb_ingest] snapshot keys={keys} raw={_debug_dump(snap)}")
+            except Exception:
+                pass
 
-        snap_ts = snap.get("ts") or snap.get("timestamp")
+        raw_ts = snap.get("ts")
+        snap_ts = raw_ts or snap.get("timestamp")
         try:
             if snap_ts is not None:
                 stats.last_snapshot_ts = float(snap_ts)
@@ -80,11 +115,15 @@ class KbIngestService:
 
         pose = self._extract_pose(snap)
 
-        detic_ts = self._extract_detic_ts(snap) or snap.get("ts")
+        # Normalize the per-source sections once; helpers below take these dicts.
+        detic_d = self._to_dict(snap.get("detic"))
+        face_d = self._to_dict(snap.get("face"))
+
+        detic_ts = self._extract_detic_ts(detic_d) or raw_ts
         if detic_ts is None:
             detic_ts = stats.last_snapshot_ts
 
-        detic_list = self._extract_detic_objects(snap)
+        detic_list = self._extract_detic_objects(snap, detic_d)
         if detic_ts is None:
             detic_ts = time.time()
 
@@ -97,6 +136,8 @@ class KbIngestService:
                     score = float(obj.get("score", obj.get("conf", 0.0)) or 0.0)
                     if score < self.detic_min_score:
                         continue
+                    if self._seen_recently("object", str(label), float(detic_ts)):
+                        continue
 
                     bbox = self._extract_bbox(obj)
                     extra = {k: v for k, v in obj.items() if k not in ("label", "name", "score", "conf", "bbox")}
@@ -111,21 +152,22 @@ class KbIngestService:
                         extra=extra,
                         dedup_window_s=self.dedup_window_s,
                     )
+                    self._mark_ingested("object", str(label), float(detic_ts))
                     stats.detic_ingested += 1
                 except Exception as exc:
-                    if str(os.environ.get("KB_INGEST_DEBUG", "0")).strip() == "1":
+                    if debug:
                         print(f"[kb_ingest] detic error for obj={obj}: {exc}")
                     stats.errors += 1
 
             self._last_detic_ts = float(detic_ts)
 
-        face_ts  = self._extract_face_ts(snap)  or snap.get("ts")
+        face_ts = self._extract_face_ts(face_d) or raw_ts
         if face_ts is None:
             face_ts = stats.last_snapshot_ts
         if face_ts is None:
             face_ts = time.time()
 
-        faces = self._extract_faces(snap)
+        faces = self._extract_faces(snap, face_d)
         if face_ts > self._last_face_ts:
             for f in faces:
                 try:
@@ -135,6 +177,8 @@ class KbIngestService:
                     score = float(f.get("score", f.get("conf", 0.0)) or 0.0)
                     if score < self.face_min_score:
                         continue
+                    if self._seen_recently("person", str(label), float(face_ts)):
+                        continue
 
                     bbox = self._extract_bbox(f)
                     extra = {k: v for k, v in f.items() if k not in ("name", "label", "person", "score", "conf", "bbox")}
@@ -149,9 +193,10 @@ class KbIngestService:
                         extra=extra,
                         dedup_window_s=self.dedup_window_s,
                     )
+                    self._mark_ingested("person", str(label), float(face_ts))
                     stats.face_ingested += 1
                 except Exception as exc:
-                    if str(os.environ.get("KB_INGEST_DEBUG", "0")).strip() == "1":
+                    if debug:
                         print(f"[kb_ingest] face error for face={f}: {exc}")
                     stats.errors += 1
 
@@ -191,15 +236,14 @@ class KbIngestService:
         except Exception:
             return None
 
-    def _extract_detic_objects(self, snap: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _extract_detic_objects(self, snap: Dict[str, Any], detic_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Tailored to visual_states.py schema (serialized):
           snap["detic"] = { "ts": float, "detections": [ {label, score, bbox?}, ... ] }
 
+        `detic_dict` is snap["detic"] already passed through _to_dict.
         Returns list of dicts with keys: label, score, bbox (optional).
         """
-        detic = snap.get("detic")
-        detic_dict = self._to_dict(detic)
 
         # Primary path: detic.detections
         dets = detic_dict.get("detections")
@@ -223,7 +267,7 @@ class KbIngestService:
 
         return []
 
-    def _extract_faces(self, snap: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _extract_faces(self, snap: Dict[str, Any], face_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Tailored to visual_states.py schema (serialized):
           snap["face"] = { "ts": float, "faces": [ {bbox, label, sim}, ... ] }
@@ -231,9 +275,8 @@ class KbIngestService:
         Normalizes to list of dicts with keys: name, score, bbox
         - name comes from "label"
         - score comes from "sim" (face similarity)
+        `face_dict` is snap["face"] already passed through _to_dict.
         """
-        face = snap.get("face")
-        face_dict = self._to_dict(face)
         faces = face_dict.get("faces")
         if isinstance(faces, list):
             out: List[Dict[str, Any]] = []
@@ -265,14 +308,12 @@ class KbIngestService:
                 return [x for x in out if x.get("name")]
         return []
 
-    def _extract_detic_ts(self, snap: Dict[str, Any]) -> Optional[float]:
-        detic = self._to_dict(snap.get("detic"))
+    def _extract_detic_ts(self, detic: Dict[str, Any]) -> Optional[float]:
         if isinstance(detic.get("ts"), (int, float)):
             return float(detic["ts"])
         return None
 
-    def _extract_face_ts(self, snap: Dict[str, Any]) -> Optional[float]:
-        face = self._to_dict(snap.get("face"))
+    def _extract_face_ts(self, face: Dict[str, Any]) -> Optional[float]:
         if isinstance(face.get("ts"), (int, float)):
             return float(face["ts"])
         return None
@@ -23,12 +23,14 @@ CREATE TABLE IF NOT EXISTS entity_aliases (
 
 CREATE UNIQUE INDEX IF NOT EXISTS idx_alias_unique ON entity_aliases(entity_id, alias);
 
--- Embeddings (stored as json list[float] to keep deps minimal)
+-- Embeddings (raw vector bytes in vec_dtype; np.frombuffer on read)
 CREATE TABLE IF NOT EXISTS entity_embeddings (
   embed_id INTEGER PRIMARY KEY AUTOINCREMENT,
   entity_id INTEGER NOT NULL,
   text TEXT NOT NULL,             -- label or alias
-  vec_json TEXT NOT NULL,
+  vec_blob BLOB NOT NULL,
+  vec_dtype TEXT NOT NULL DEFAULT 'f4',  -- numpy dtype code: 'f2' (current) | 'f4' (older rows)
+  vec_json TEXT,                  -- legacy, only set on rows migrated from the json layout
   ts REAL NOT NULL,
   FOREIGN KEY(entity_id) REFERENCES entities(entity_id)
 );
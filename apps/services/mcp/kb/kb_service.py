@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 from ..embeddings.gemini_embedder import GeminiEmbedder
-from ..embeddings.similarity import cosine_similarity
+from ..embeddings.similarity import cosine_similarity_batch, top_k_indices
 from .kb_store import KbStore
 
 
+@lru_cache(maxsize=4096)
+def _norm(s: Optional[str]) -> str:
+    # kind/label come from a small detector vocabulary; memoize the strip.
+    return (s or "").strip()
+
+
 @dataclass
 class KbQueryResult:
     found: bool
@@ -26,11 +35,44 @@ class KbService:
     - ingest_detection(kind,label,score,bbox,pose[,aliases])
     - query(kind, q) via embeddings
     - last_seen(kind,label)
+
+    Entity ids / last_seen_ts are cached in memory for the ingest dedup check;
+    writes to the store that bypass this service must call invalidate_entity_cache().
     """
 
-    def __init__(self, store: KbStore, embedder: GeminiEmbedder):
+    def __init__(self, store: KbStore, embedder: GeminiEmbedder, entity_cache_size: int = 4096):
         self.store = store
         self.embedder = embedder
+        # (kind, label) -> (entity_id, last_seen_ts), LRU order
+        self._entity_cache: "OrderedDict[Tuple[str, str], Tuple[int, Optional[float]]]" = OrderedDict()
+        self._entity_cache_size = entity_cache_size
+        self._entity_cache_lock = threading.Lock()
+
+    def invalidate_entity_cache(self) -> None:
+        with self._entity_cache_lock:
+            self._entity_cache.clear()
+
+    def _get_cached_entity(self, kind: str, label: str) -> Optional[Tuple[int, Optional[float]]]:
+        key = (kind, label)
+        with self._entity_cache_lock:
+            hit = self._entity_cache.get(key)
+            if hit is not None:
+                self._entity_cache.move_to_end(key)
+                return hit
+        ent = self.store.get_entity(kind, label)
+        if not ent:
+            return None
+        hit = (int(ent["entity_id"]), ent.get("last_seen_ts"))
+        self._remember_entity(kind, label, *hit)
+        return hit
+
+    def _remember_entity(self, kind: str, label: str, entity_id: int, last_seen_ts: Optional[float]) -> None:
+        key = (kind, label)
+        with self._entity_cache_lock:
+            self._entity_cache[key] = (entity_id, last_seen_ts)
+            self._entity_cache.move_to_end(key)
+            while len(self._entity_cache) > self._entity_cache_size:
+                self._entity_cache.popitem(last=False)
 
     def ingest_detection(
         self,
@@ -46,52 +88,45 @@ class KbService:
         dedup_window_s: float = 1.0,
     ) -> int:
         ts = float(ts) if ts is not None else time.time()
-        kind = (kind or "").strip()
-        label = (label or "").strip()
+        kind = _norm(kind)
+        label = _norm(label)
         if not kind or not label:
             return -1
 
         # Look up existing entity first
-        existing = self.store.get_entity(kind, label)
+        existing = self._get_cached_entity(kind, label)
         recent_seen = False
-        if existing and existing.get("last_seen_ts") is not None:
+        if existing and existing[1] is not None:
             try:
-                last_ts = float(existing["last_seen_ts"])
+                last_ts = float(existing[1])
                 recent_seen = (ts - last_ts) < float(dedup_window_s)
             except Exception:
                 recent_seen = False
 
-        entity_id = self.store.upsert_entity(kind, label)
+        aliases = [a for a in map(_norm, aliases or []) if a]
 
-        # Store aliases
-        if aliases:
-            for a in aliases:
-                a = (a or "").strip()
-                if a:
-                    self.store.add_alias(entity_id, a)
-
-        # Only compute / upsert embeddings if not recently seen
+        # Only compute embeddings if not recently seen (done before the
+        # transaction so remote calls never hold the store lock).
+        embeddings: List[Tuple[str, Any]] = []
         if not recent_seen:
-            vec = self.embedder.embed(f"{kind}:{label}")
-            if vec:
-                self.store.put_embedding(entity_id, f"{kind}:{label}", vec)
-
-            if aliases:
-                for a in aliases:
-                    a = (a or "").strip()
-                    if not a:
-                        continue
-                    avec = self.embedder.embed(f"{kind}:{a}")
-                    if avec:
-                        self.store.put_embedding(entity_id, f"{kind}:{a}", avec)
-
-        self.store.update_last_seen(entity_id, ts, pose)
+            texts = [f"{kind}:{label}"] + [f"{kind}:{a}" for a in aliases]
+            vecs = self.embedder.embed_batch(texts)
+            embeddings = [(t, v) for t, v in zip(texts, vecs) if v.size]
+
+        with self.store.transaction() as tx:
+            entity_id = self.store._upsert_entity_conn(tx, kind, label)
+            for a in aliases:
+                self.store._add_alias_conn(tx, entity_id, a)
+            for text, vec in embeddings:
+                self.store._put_embedding_conn(tx, entity_id, text, vec)
+            self.store._update_last_seen_conn(tx, entity_id, ts, pose)
         self.store.add_observation(entity_id, ts, score, bbox, pose, extra=extra)
+        self._remember_entity(kind, label, entity_id, ts)
         return entity_id
 
     def last_seen(self, *, kind: str, label: str) -> Dict[str, Any]:
-        kind = (kind or "").strip()
-        label = (label or "").strip()
+        kind = _norm(kind)
+        label = _norm(label)
         if not kind or not label:
             return {"ok": False, "error": "kind and label required"}
 
@@ -101,7 +136,7 @@ class KbService:
         return {"ok": True, "found": True, **ent}
 
     def query(self, *, kind: str, q: str, top_k: int = 1, min_score: float = 0.55) -> Dict[str, Any]:
-        kind = (kind or "").strip()
+        kind = _norm(kind)
         q = (q or "").strip()
         if not kind:
             return {"ok": False, "error": "kind required"}
@@ -109,29 +144,31 @@ class KbService:
             return {"ok": False, "error": "q required"}
 
         qvec = self.embedder.embed(f"{kind}:{q}")
-        if not qvec:
+        if qvec.size == 0:
             return {"ok": False, "error": "embedding failed"}
 
-        raw_candidates = self.store.get_embeddings_by_kind(kind)
-        scored: List[KbQueryResult] = []
+        km = self.store.get_kind_matrix(kind)
+        sims = cosine_similarity_batch(km.m, qvec, row_norms=km.row_norms)
+        top_idx = top_k_indices(sims, top_k)
 
-        for c in raw_candidates:
-            sim = cosine_similarity(qvec, c["vec"])
-            scored.append(
+        # last_seen changes on every ingest, so it is read fresh for the top-k only.
+        entities = self.store.get_entities_by_ids([km.entity_ids[i] for i in top_idx])
+
+        top_items: List[KbQueryResult] = []
+        for i in top_idx:
+            ent = entities.get(km.entity_ids[i]) or {}
+            top_items.append(
                 KbQueryResult(
                     found=True,
-                    label=c["label"],
-                    entity_id=c["entity_id"],
-                    score=float(sim),
-                    last_seen_ts=c.get("last_seen_ts"),
-                    last_seen=c.get("last_seen"),
-                    matched_text=c.get("embed_text"),
+                    label=km.labels[i],
+                    entity_id=km.entity_ids[i],
+                    score=float(sims[i]),
+                    last_seen_ts=ent.get("last_seen_ts"),
+                    last_seen=ent.get("last_seen"),
+                    matched_text=km.texts[i],
                 )
             )
 
-        scored.sort(key=lambda x: x.score, reverse=True)
-        top_items = scored[: max(1, int(top_k))]
-
         best = top_items[0] if top_items else None
         if not best or best.score < float(min_score):
             return {
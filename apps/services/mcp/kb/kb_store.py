@@ -1,28 +1,114 @@
 from __future__ import annotations
 
 import json
+import queue
 import sqlite3
 import threading
 import time
 import os
-from typing import Any, Dict, List, Optional, Tuple
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
 
 from .kb_schema import KB_SCHEMA_SQL
 
+# INSERT ... RETURNING needs SQLite >= 3.35.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Embeddings are stored as float16 (half the bytes of float32, cosine error ~1e-3)
+# and widened to float32 when loaded.
+_STORE_DTYPE = "f2"
+
+
+def _decode_vec(blob: bytes, dtype: Optional[str]) -> np.ndarray:
+    return np.frombuffer(blob, dtype=dtype or "f4").astype(np.float32)
+
+
+@dataclass(frozen=True)
+class KindMatrix:
+    """
+    All embeddings of one kind stacked for batched similarity.
+    Row i belongs to entity_ids[i] / labels[i] / texts[i].
+    """
+    version: int
+    entity_ids: List[int]
+    labels: List[str]
+    texts: List[str]
+    m: np.ndarray          # (N, D) float32
+    row_norms: np.ndarray  # (N,) float32
+
 
 class KbStore:
+    OBS_BATCH_MAX = 500
+    OBS_BATCH_WAIT_S = 0.1
 
     def __init__(self, db_path: str):
         self.db_path = db_path
         self._lock = threading.Lock()
+        self._tls = threading.local()
+        # kind -> version, bumped whenever an embedding of that kind changes
+        self._versions: Dict[str, int] = {}
+        self._kind_cache: Dict[str, KindMatrix] = {}
         self._init_db()
+        # Observations are append-only history; batch them off the ingest path.
+        self._obs_queue: "queue.Queue[tuple]" = queue.Queue()
+        self._obs_flusher = threading.Thread(target=self._obs_flush_loop, name="kb-obs-flush", daemon=True)
+        self._obs_flusher.start()
 
     def _connect(self) -> sqlite3.Connection:
         conn = sqlite3.connect(self.db_path, check_same_thread=False)
         conn.execute("PRAGMA journal_mode=WAL;")
         conn.execute("PRAGMA synchronous=NORMAL;")
+        # Bigger page cache + mmap for the hot entity/embedding pages; with
+        # per-thread connections these run once per thread.
+        conn.execute("PRAGMA cache_size=-65536;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA mmap_size=268435456;")
+        conn.execute("PRAGMA wal_autocheckpoint=1000;")
+        conn.execute("PRAGMA busy_timeout=5000;")
         return conn
 
+    def _conn(self) -> sqlite3.Connection:
+        """
+        Per-thread persistent connection, closed when its thread goes away.
+        WAL lets readers use it without the lock; writes still serialize on self._lock.
+        """
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._tls.conn = conn
+            weakref.finalize(threading.current_thread(), conn.close)
+        return conn
+
+    def close(self) -> None:
+        """Flush queued observations, then close the calling thread's connection (others close on thread exit)."""
+        self.flush()
+        conn = getattr(self._tls, "conn", None)
+        if conn is not None:
+            self._tls.conn = None
+            conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        One write transaction (BEGIN IMMEDIATE ... COMMIT) on this thread's connection.
+        Holds the store lock throughout; use the _*_conn helpers inside, not the public writers.
+        """
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            finally:
+                # Body raised, or COMMIT itself failed (busy, disk full): don't leave this
+                # thread's connection inside an open transaction for the next BEGIN.
+                if conn.in_transaction:
+                    conn.rollback()
+
     def _init_db(self) -> None:
         if self.db_path:
             parent = os.path.dirname(os.path.abspath(self.db_path))
@@ -31,9 +117,25 @@ class KbStore:
         with self._lock:
             conn = self._connect()
             try:
+                # Legacy layout stored vectors only as vec_json; move it aside and rebuild.
+                cols = {r[1] for r in conn.execute("PRAGMA table_info(entity_embeddings)")}
+                if cols and "vec_blob" not in cols:
+                    conn.execute("ALTER TABLE entity_embeddings RENAME TO entity_embeddings_legacy")
+                    conn.execute("DROP INDEX IF EXISTS idx_entity_embeddings_entity")
+                    conn.execute("DROP INDEX IF EXISTS idx_entity_embeddings_unique")
+                    conn.commit()
+
                 # Base schema
                 conn.executescript(KB_SCHEMA_SQL)
 
+                # BLOB rows written before vec_dtype existed are float32.
+                cols = {r[1] for r in conn.execute("PRAGMA table_info(entity_embeddings)")}
+                if "vec_dtype" not in cols:
+                    conn.execute("ALTER TABLE entity_embeddings ADD COLUMN vec_dtype TEXT NOT NULL DEFAULT 'f4'")
+                    conn.commit()
+
+                self._migrate_legacy_embeddings(conn)
+
                 # Ensure uniqueness for embedding upserts
                 conn.execute(
                     """
@@ -50,125 +152,206 @@ class KbStore:
                     """
                 )
 
+                # Earlier builds added a covering index keyed on the last_seen_* columns;
+                # nothing reads it and every last-seen update had to rewrite it.
+                conn.execute("DROP INDEX IF EXISTS idx_entities_kind_cover")
+
+                # Give the planner statistics once, then let optimize keep them fresh.
+                has_stats = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+                ).fetchone()
+                conn.execute("PRAGMA optimize;" if has_stats else "ANALYZE;")
+
                 conn.commit()
             finally:
                 conn.close()
 
+    def _migrate_legacy_embeddings(self, conn: sqlite3.Connection) -> None:
+        """
+        One-shot copy of entity_embeddings_legacy (vec_json only) into the BLOB table.
+        Safe to re-run if a previous migration was interrupted.
+        """
+        legacy = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='entity_embeddings_legacy'"
+        ).fetchone()
+        if not legacy:
+            return
+        rows = conn.execute("SELECT embed_id, entity_id, text, vec_json, ts FROM entity_embeddings_legacy").fetchall()
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO entity_embeddings(embed_id, entity_id, text, vec_blob, vec_json, ts)
+            VALUES(?,?,?,?,?,?)
+            """,
+            (
+                (eid, ent, text, np.asarray(json.loads(vj), dtype=np.float32).tobytes(), vj, ts)
+                for eid, ent, text, vj, ts in rows
+            ),
+        )
+        conn.execute("DROP TABLE entity_embeddings_legacy")
+        conn.commit()
+
     def upsert_entity(self, kind: str, label: str) -> int:
-        now = time.time()
-        with self._lock:
-            conn = self._connect()
-            try:
-                conn.execute(
-                    """
-                    INSERT INTO entities(kind, label, created_ts)
-                    VALUES(?,?,?)
-                    ON CONFLICT(kind, label) DO NOTHING
-                    """,
-                    (kind, label, now),
-                )
-                conn.commit()
-                row = conn.execute(
-                    "SELECT entity_id FROM entities WHERE kind=? AND label=?",
-                    (kind, label),
-                ).fetchone()
-                return int(row[0])
-            finally:
-                conn.close()
+        with self.transaction() as conn:
+            return self._upsert_entity_conn(conn, kind, label)
+
+    def _upsert_entity_conn(self, conn: sqlite3.Connection, kind: str, label: str) -> int:
+        if _HAS_RETURNING:
+            # No-op update on conflict so RETURNING also yields the existing id.
+            row = conn.execute(
+                """
+                INSERT INTO entities(kind, label, created_ts)
+                VALUES(?,?,?)
+                ON CONFLICT(kind, label) DO UPDATE SET label=entities.label
+                RETURNING entity_id
+                """,
+                (kind, label, time.time()),
+            ).fetchone()
+            return int(row[0])
+
+        conn.execute(
+            """
+            INSERT INTO entities(kind, label, created_ts)
+            VALUES(?,?,?)
+            ON CONFLICT(kind, label) DO NOTHING
+            """,
+            (kind, label, time.time()),
+        )
+        row = conn.execute(
+            "SELECT entity_id FROM entities WHERE kind=? AND label=?",
+            (kind, label),
+        ).fetchone()
+        return int(row[0])
 
     def add_alias(self, entity_id: int, alias: str) -> None:
         alias = (alias or "").strip()
         if not alias:
             return
-        with self._lock:
-            conn = self._connect()
-            try:
-                conn.execute(
-                    "INSERT OR IGNORE INTO entity_aliases(entity_id, alias) VALUES(?,?)",
-                    (entity_id, alias),
-                )
-                conn.commit()
-            finally:
-                conn.close()
+        with self.transaction() as conn:
+            self._add_alias_conn(conn, entity_id, alias)
+
+    def _add_alias_conn(self, conn: sqlite3.Connection, entity_id: int, alias: str) -> None:
+        conn.execute(
+            "INSERT OR IGNORE INTO entity_aliases(entity_id, alias) VALUES(?,?)",
+            (entity_id, alias),
+        )
 
-    def put_embedding(self, entity_id: int, text: str, vec: List[float]) -> None:
+    def put_embedding(self, entity_id: int, text: str, vec: Union[np.ndarray, List[float]]) -> None:
         """
         Upsert embedding for (entity_id, text).
         Requires unique index on (entity_id, text) which _init_db ensures.
         """
-        now = time.time()
-        vec_json = json.dumps(vec)
+        with self.transaction() as conn:
+            self._put_embedding_conn(conn, entity_id, text, vec)
+
+    def _put_embedding_conn(
+        self, conn: sqlite3.Connection, entity_id: int, text: str, vec: Union[np.ndarray, List[float]]
+    ) -> None:
+        vec_blob = np.asarray(vec, dtype=np.float32).astype(_STORE_DTYPE).tobytes()
+        # No-op (and no cache invalidation) when the stored vector is unchanged.
+        cur = conn.execute(
+            """
+            INSERT INTO entity_embeddings(entity_id, text, vec_blob, vec_dtype, ts)
+            VALUES(?,?,?,?,?)
+            ON CONFLICT(entity_id, text) DO UPDATE SET
+              vec_blob=excluded.vec_blob,
+              vec_dtype=excluded.vec_dtype,
+              vec_json=NULL,
+              ts=excluded.ts
+            WHERE vec_blob IS NOT excluded.vec_blob OR vec_dtype IS NOT excluded.vec_dtype
+            """,
+            (entity_id, text, vec_blob, _STORE_DTYPE, time.time()),
+        )
+        if cur.rowcount > 0:
+            row = conn.execute("SELECT kind FROM entities WHERE entity_id=?", (entity_id,)).fetchone()
+            if row:
+                self._versions[row[0]] = self._versions.get(row[0], 0) + 1
+
+    def get_kind_matrix(self, kind: str) -> KindMatrix:
+        """
+        Cached (N, D) embedding matrix for `kind`; rebuilt only after put_embedding
+        changed a vector of that kind. Rows whose dim differs from the first row are
+        left as zeros (they score 0.0).
+        """
         with self._lock:
-            conn = self._connect()
-            try:
-                conn.execute(
-                    """
-                    INSERT INTO entity_embeddings(entity_id, text, vec_json, ts)
-                    VALUES(?,?,?,?)
-                    ON CONFLICT(entity_id, text) DO UPDATE SET
-                      vec_json=excluded.vec_json,
-                      ts=excluded.ts
-                    """,
-                    (entity_id, text, vec_json, now),
-                )
-                conn.commit()
-            finally:
-                conn.close()
+            version = self._versions.get(kind, 0)
+            cached = self._kind_cache.get(kind)
+            if cached is not None and cached.version == version:
+                return cached
+
+        rows = self._conn().execute(
+            """
+            SELECT e.entity_id, e.label, em.text, em.vec_blob, em.vec_dtype
+            FROM entities e
+            JOIN entity_embeddings em ON em.entity_id = e.entity_id
+            WHERE e.kind = ?
+            """,
+            (kind,),
+        ).fetchall()
 
-    def get_embeddings_by_kind(self, kind: str) -> List[Dict[str, Any]]:
+        vecs = [_decode_vec(r[3], r[4]) for r in rows]
+        dim = vecs[0].shape[0] if vecs else 0
+        m = np.zeros((len(vecs), dim), dtype=np.float32)
+        for i, v in enumerate(vecs):
+            if v.shape[0] == dim:
+                m[i] = v
+
+        # Tagged with the version read above: a concurrent write simply forces a rebuild next time.
+        km = KindMatrix(
+            version=version,
+            entity_ids=[int(r[0]) for r in rows],
+            labels=[r[1] for r in rows],
+            texts=[r[2] for r in rows],
+            m=m,
+            row_norms=np.sqrt(np.einsum("ij,ij->i", m, m)),
+        )
         with self._lock:
-            conn = self._connect()
-            try:
-                rows = conn.execute(
-                    """
-                    SELECT e.entity_id,
-                           e.label,
-                           e.last_seen_ts,
-                           e.last_seen_x, e.last_seen_y, e.last_seen_heading,
-                           em.text, em.vec_json
-                    FROM entities e
-                    JOIN entity_embeddings em ON em.entity_id = e.entity_id
-                    WHERE e.kind = ?
-                    """,
-                    (kind,),
-                ).fetchall()
-
-                out: List[Dict[str, Any]] = []
-                for r in rows:
-                    out.append(
-                        {
-                            "entity_id": int(r[0]),
-                            "label": r[1],
-                            "last_seen_ts": r[2],
-                            "last_seen": {"x": r[3], "y": r[4], "heading": r[5]},
-                            "embed_text": r[6],
-                            "vec": json.loads(r[7]),
-                        }
-                    )
-                return out
-            finally:
-                conn.close()
+            self._kind_cache[kind] = km
+        return km
+
+    def get_entities_by_ids(self, entity_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        ids = list(dict.fromkeys(int(i) for i in entity_ids))
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        conn = self._conn()
+        rows = conn.execute(
+            f"""
+            SELECT entity_id, label, last_seen_ts, last_seen_x, last_seen_y, last_seen_heading
+            FROM entities
+            WHERE entity_id IN ({placeholders})
+            """,
+            ids,
+        ).fetchall()
+        return {
+            int(r[0]): {
+                "entity_id": int(r[0]),
+                "label": r[1],
+                "last_seen_ts": r[2],
+                "last_seen": {"x": r[3], "y": r[4], "heading": r[5]},
+            }
+            for r in rows
+        }
 
     def update_last_seen(self, entity_id: int, ts: float, pose: Optional[Dict[str, float]]) -> None:
+        with self.transaction() as conn:
+            self._update_last_seen_conn(conn, entity_id, ts, pose)
+
+    def _update_last_seen_conn(
+        self, conn: sqlite3.Connection, entity_id: int, ts: float, pose: Optional[Dict[str, float]]
+    ) -> None:
         x = y = h = None
         if pose:
             x = pose.get("x")
             y = pose.get("y")
             h = pose.get("heading")
-        with self._lock:
-            conn = self._connect()
-            try:
-                conn.execute(
-                    """
-                    UPDATE entities
-                    SET last_seen_ts=?, last_seen_x=?, last_seen_y=?, last_seen_heading=?
-                    WHERE entity_id=?
-                    """,
-                    (ts, x, y, h, entity_id),
-                )
-                conn.commit()
-            finally:
-                conn.close()
+        conn.execute(
+            """
+            UPDATE entities
+            SET last_seen_ts=?, last_seen_x=?, last_seen_y=?, last_seen_heading=?
+            WHERE entity_id=?
+            """,
+            (ts, x, y, h, entity_id),
+        )
 
     def add_observation(
         self,
@@ -179,6 +362,10 @@ class KbStore:
         pose: Optional[Dict[str, float]],
         extra: Optional[Dict[str, Any]] = None,
     ) -> None:
+        """
+        Non-blocking: queued and written in batches by the flusher thread.
+        Call flush() when the rows must be visible.
+        """
         bbox_json = json.dumps(bbox) if bbox is not None else None
         extra_json = json.dumps(extra or {})
         x = y = h = None
@@ -186,85 +373,95 @@ class KbStore:
             x = pose.get("x")
             y = pose.get("y")
             h = pose.get("heading")
+        self._obs_queue.put((entity_id, ts, score, bbox_json, x, y, h, extra_json))
 
-        with self._lock:
-            conn = self._connect()
+    def flush(self) -> None:
+        """Block until every queued observation has been written."""
+        self._obs_queue.join()
+
+    def _obs_flush_loop(self) -> None:
+        while True:
+            rows = [self._obs_queue.get()]
+            deadline = time.monotonic() + self.OBS_BATCH_WAIT_S
+            while len(rows) < self.OBS_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._obs_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
             try:
-                conn.execute(
-                    """
-                    INSERT INTO observations(entity_id, ts, score, bbox_json, x, y, heading, extra_json)
-                    VALUES(?,?,?,?,?,?,?,?)
-                    """,
-                    (entity_id, ts, score, bbox_json, x, y, h, extra_json),
-                )
-                conn.commit()
+                with self.transaction() as conn:
+                    conn.executemany(
+                        """
+                        INSERT INTO observations(entity_id, ts, score, bbox_json, x, y, heading, extra_json)
+                        VALUES(?,?,?,?,?,?,?,?)
+                        """,
+                        rows,
+                    )
+            except Exception as exc:
+                print(f"[kb_store] dropped {len(rows)} observations: {exc}")
             finally:
-                conn.close()
+                for _ in rows:
+                    self._obs_queue.task_done()
 
     def get_entity(self, kind: str, label: str) -> Optional[Dict[str, Any]]:
-        with self._lock:
-            conn = self._connect()
-            try:
-                row = conn.execute(
-                    """
-                    SELECT entity_id, label, last_seen_ts, last_seen_x, last_seen_y, last_seen_heading
-                    FROM entities
-                    WHERE kind=? AND label=?
-                    """,
-                    (kind, label),
-                ).fetchone()
-                if not row:
-                    return None
-                return {
-                    "entity_id": int(row[0]),
-                    "label": row[1],
-                    "last_seen_ts": row[2],
-                    "last_seen": {"x": row[3], "y": row[4], "heading": row[5]},
-                }
-            finally:
-                conn.close()
+        conn = self._conn()
+        row = conn.execute(
+            """
+            SELECT entity_id, label, last_seen_ts, last_seen_x, last_seen_y, last_seen_heading
+            FROM entities
+            WHERE kind=? AND label=?
+            """,
+            (kind, label),
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "entity_id": int(row[0]),
+            "label": row[1],
+            "last_seen_ts": row[2],
+            "last_seen": {"x": row[3], "y": row[4], "heading": row[5]},
+        }
 
     def list_entities(self, kind: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
         """
         Uses a SQLite-friendly ordering to emulate "NULLS LAST":
           ORDER BY (last_seen_ts IS NULL), last_seen_ts DESC
         """
-        with self._lock:
-            conn = self._connect()
-            try:
-                if kind:
-                    rows = conn.execute(
-                        """
-                        SELECT entity_id, kind, label, last_seen_ts, last_seen_x, last_seen_y, last_seen_heading
-                        FROM entities
-                        WHERE kind=?
-                        ORDER BY (last_seen_ts IS NULL) ASC, last_seen_ts DESC
-                        LIMIT ?
-                        """,
-                        (kind, limit),
-                    ).fetchall()
-                else:
-                    rows = conn.execute(
-                        """
-                        SELECT entity_id, kind, label, last_seen_ts, last_seen_x, last_seen_y, last_seen_heading
-                        FROM entities
-                        ORDER BY (last_seen_ts IS NULL) ASC, last_seen_ts DESC
-                        LIMIT ?
-                        """,
-                        (limit,),
-                    ).fetchall()
-
-                out: List[Dict[str, Any]] = []
-                for r in rows:
-                    out.append(
-                        {
-                            "entity_id": int(r[0]),
-                            "kind": r[1],
-                            "label": r[2],
-                            "last_seen_ts": r[3],
-                            "last_seen": {"x": r[4], "y": r[5], "heading": r[6]},
-                        }
-                    )
-                return out
-            finally:
-                conn.close()
+        conn = self._conn()
+        if kind:
+            rows = conn.execute(
+                """
+                SELECT entity_id, kind, label, last_seen_ts, last_seen_x, last_seen_y, last_seen_heading
+                FROM entities
+                WHERE kind=?
+                ORDER BY (last_seen_ts IS NULL) ASC, last_seen_ts DESC
+                LIMIT ?
+                """,
+                (kind, limit),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                """
+                SELECT entity_id, kind, label, last_seen_ts, last_seen_x, last_seen_y, last_seen_heading
+                FROM entities
+                ORDER BY (last_seen_ts IS NULL) ASC, last_seen_ts DESC
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+
+        out: List[Dict[str, Any]] = []
+        for r in rows:
+            out.append(
+                {
+                    "entity_id": int(r[0]),
+                    "kind": r[1],
+                    "label": r[2],
+                    "last_seen_ts": r[3],
+                    "last_seen": {"x": r[4], "y": r[5], "heading": r[6]},
+                }
+            )
+        return out
@@ -1,9 +1,15 @@
 from dataclasses import dataclass
 import json
 import os
+import threading
 import urllib.error
 import urllib.request
-from typing import Any, Dict, Protocol
+from typing import Any, Dict, Optional, Protocol
+
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    httpx = None
 
 
 @dataclass
@@ -28,11 +34,38 @@ class LLMClient(Protocol):
         ...
 
 
+# One pooled client for every LLM call in the process: a /plan request makes
+# up to three calls, and reusing keep-alive (HTTP/2 when `h2` is installed)
+# connections skips a TCP+TLS handshake on each.
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> Optional[Any]:
+    global _client
+    if httpx is None:
+        return None
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            try:
+                _client = httpx.Client(http2=True, limits=limits)
+            except ImportError:
+                _client = httpx.Client(limits=limits)
+    return _client
+
+
 def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeout: float = 30.0) -> Dict[str, Any]:
     """
-    Minimal HTTP JSON POST helper to avoid external deps.
+    Minimal HTTP JSON POST helper; uses the pooled httpx client when available,
+    plain urllib otherwise.
     """
     data = json.dumps(payload).encode("utf-8")
+    client = _get_client()
+    if client is not None:
+        return _post_json_httpx(client, url, data, headers, timeout)
     request = urllib.request.Request(url, data=data, headers=headers, method="POST")
     try:
         with urllib.request.urlopen(request, timeout=timeout) as resp:
@@ -51,6 +84,21 @@ def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str], timeo
         raise LLMError(f"Bad JSON from {url}: {snippet}") from exc
 
 
+def _post_json_httpx(
+    client: Any, url: str, data: bytes, headers: Dict[str, str], timeout: float
+) -> Dict[str, Any]:
+    try:
+        resp = client.post(url, content=data, headers={**headers, "Connection": "keep-alive"}, timeout=timeout)
+    except Exception as exc:  # pragma: no cover - network path
+        raise LLMError(f"Request failed for {url}: {exc}") from exc
+    if resp.status_code >= 400:  # pragma: no cover - network path
+        raise LLMError(f"HTTP {resp.status_code} for {url}: {resp.text or resp.reason_phrase}")
+    try:
+        return resp.json()
+    except ValueError as exc:  # pragma: no cover - network path
+        raise LLMError(f"Bad JSON from {url}: {resp.text[:200]}") from exc
+
+
 class OllamaClient:
     def __init__(self, model: str | None = None, base_url: str | None = None):
         self.model = model or os.environ.get("OLLAMA_MODEL", "llama3")
@@ -4,6 +4,65 @@ import json
 import re
 from typing import Any, Dict, Optional
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Compact JSON as UTF-8 bytes (orjson when installed)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. non-str keys or ints beyond 64 bits; stdlib handles those
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    """orjson first; stdlib json as the lenient fallback (NaN/Infinity, huge ints)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass
+    return json.loads(data)
+
+
+# Trailing commas before } or ]; the whitespace is kept so error offsets stay readable.
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+
+def _find_first_json_object(s: str) -> Optional[str]:
+    """
+    Single pass over s: first balanced {...}, ignoring braces inside JSON strings.
+    """
+    start = s.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return s[start : i + 1]
+    return None
+
 
 def extract_json_object(text: str) -> Optional[str]:
     if not text:
@@ -21,14 +80,7 @@ def extract_json_object(text: str) -> Optional[str]:
     if text.startswith("{") and text.endswith("}"):
         return text
 
-    m = re.search(r"\{.*\}", text, flags=re.DOTALL)
-    if m:
-        return m.group(0).strip()
-
-    fenced = re.search(r"```(?:json)?\s*({.*?})\s*```", text, flags=re.DOTALL)
-    if fenced:
-        return fenced.group(1).strip()
-    return None
+    return _find_first_json_object(text)
 
 
 def try_parse_json(text: str) -> Optional[Dict[str, Any]]:
@@ -36,12 +88,11 @@ def try_parse_json(text: str) -> Optional[Dict[str, Any]]:
     if not js:
         return None
     try:
-        obj = json.loads(js)
+        obj = loads(js)
     except Exception:
-        cleaned = re.sub(r",\s*}", "}", js)
-        cleaned = re.sub(r",\s*]", "]", cleaned)
+        cleaned = _TRAILING_COMMA_RE.sub(r"\1", js)
         try:
-            obj = json.loads(cleaned)
+            obj = loads(cleaned)
         except Exception:
             return None
     if isinstance(obj, dict):
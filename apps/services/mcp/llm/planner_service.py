@@ -2,35 +2,69 @@ from __future__ import annotations
 
 import json
 import os
+import queue
+import re
 import threading
 import base64
+import functools
+import io
+import mmap
+import struct
 import subprocess
-import tempfile
 import wave
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict, List, Set, Tuple
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
 
 from vosk import Model, KaldiRecognizer  # type: ignore
 
+try:
+    import av  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    av = None
+
 from .agent import Agent
-from .json_utils import try_parse_json
-from .prompts import SYSTEM_PROMPT, build_user_prompt
-from .validate import validate_plan
+from .json_utils import dumps_bytes, loads, try_parse_json
+from .prompts import SYSTEM_PROMPT, build_user_prompt, tools_prompt_json
+from .validate import repair_plan, validate_plan
 from ..planner.mcp_tools import DEFAULT_PLANNER_TOOLS
 
 
-_vosk_model: Model | None = None
+# Always use MCP-defined tools; ignore caller-provided tools to avoid drift.
+# They are static, so the allow-list and prompt JSON are built once.
+_ALLOWED_TOOLS: FrozenSet[str] = frozenset(
+    t["name"] for t in DEFAULT_PLANNER_TOOLS if isinstance(t, dict) and t.get("name")
+)
+_TOOLS_JSON = tools_prompt_json(DEFAULT_PLANNER_TOOLS)
 
 
+@functools.lru_cache(maxsize=1)
 def _load_vosk_model() -> Model:
-    global _vosk_model
-    if _vosk_model is not None:
-        return _vosk_model
+    # Warmed by start_planner_service before serving (and before any fork, so
+    # worker processes would share the pages copy-on-write).
     default_model = Path(__file__).resolve().parent.parent / "stt" / "model"
     model_path = os.environ.get("VOSK_MODEL_PATH", str(default_model))
-    _vosk_model = Model(model_path)
-    return _vosk_model
+    return Model(model_path)
+
+
+# Leading "{" (after whitespace) or a plan marker anywhere, case-insensitive.
+_PLAN_RE = re.compile(r"\A\s*\{|goal_type|mcp\.plan\.v1", re.IGNORECASE)
+
+
+# The failing reply is echoed back verbatim (it is what produced plan_obj) for
+# the LLM repair prompt; capped to bound prompt size.
+_REPAIR_ECHO_MAX = 2000
+
+# Transcript wording that can map to a plan (find/approach/enroll). A plan-shaped
+# reply to a short transcript with none of these is treated as chat without paying
+# for the strict reprompt; the hint only ever removes reprompts.
+_PLAN_INTENT_RE = re.compile(
+    r"\b(find|approach|go to|walk to|move to|head to|locate|look for|search|where|"
+    r"bring|fetch|pick up|enroll|my name is|call me)\b",
+    re.IGNORECASE,
+)
+# Transcripts longer than this keep the strict reprompt for plan-shaped replies.
+_CHAT_MAX_CHARS = 80
 
 
 def _looks_like_plan(text: str) -> bool:
@@ -40,24 +74,121 @@ def _looks_like_plan(text: str) -> bool:
     """
     if not text:
         return False
-    t = text.strip().lower()
-    if t.startswith("{") or "goal_type" in t or "mcp.plan.v1" in t:
-        return True
-    return False
+    # One regex pass; no stripped/lowercased copy of the whole reply.
+    return _PLAN_RE.search(text) is not None
 
 
-def _transcribe_audio_file(path: str) -> str:
-    model = _load_vosk_model()
-    with wave.open(path, "rb") as wf:
-        rec = KaldiRecognizer(model, wf.getframerate())
+# Concurrent Vosk decodes allowed across handler threads (CPU-bound; LLM calls are not capped).
+_MAX_TRANSCRIBE = int(os.environ.get("PLANNER_MAX_TRANSCRIBE", "4"))
+_transcribe_slots = threading.BoundedSemaphore(_MAX_TRANSCRIBE)
+
+# Largest /plan body read into memory (base64 audio included); bigger ones get 413.
+_MAX_BODY = int(os.environ.get("PLANNER_MAX_BODY", str(25 * 1024 * 1024)))
+
+# Idle recognizers per sample rate; building one allocates the full decoder state.
+_REC_POOL: Dict[int, "queue.Queue[KaldiRecognizer]"] = {}
+_REC_POOL_MAX = _MAX_TRANSCRIBE
+_rec_pool_lock = threading.Lock()
+
+
+def _rec_pool(rate: int) -> "queue.Queue[KaldiRecognizer]":
+    with _rec_pool_lock:
+        return _REC_POOL.setdefault(rate, queue.Queue(maxsize=_REC_POOL_MAX))
+
+
+def _recognize_pcm(rate: int, chunks: Iterable[bytes]) -> str:
+    pool = _rec_pool(rate)
+    try:
+        rec = pool.get_nowait()
+    except queue.Empty:
+        rec = KaldiRecognizer(_load_vosk_model(), rate)
         rec.SetWords(False)
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
+
+    # On a decode error the recognizer is simply dropped (its state is unknown).
+    for data in chunks:
+        if data:
             rec.AcceptWaveform(data)
-        res = json.loads(rec.FinalResult() or "{}")
-        return (res.get("text") or "").strip()
+    res = json.loads(rec.FinalResult() or "{}")
+    rec.Reset()
+    try:
+        pool.put_nowait(rec)
+    except queue.Full:
+        pass
+    return (res.get("text") or "").strip()
+
+
+# ~1 s of audio per AcceptWaveform call at 16 kHz; fewer crossings into Kaldi.
+_PCM_CHUNK_FRAMES = 16000
+
+
+def _wave_chunks(wf: wave.Wave_read) -> Iterable[bytes]:
+    while True:
+        data = wf.readframes(_PCM_CHUNK_FRAMES)
+        if len(data) == 0:
+            return
+        yield data
+
+
+def _wav_data_span(buf: Any) -> Tuple[int, int]:
+    """(offset, length) of the RIFF 'data' chunk in a WAV buffer."""
+    pos = 12  # past "RIFF" <size> "WAVE"
+    end = len(buf)
+    while pos + 8 <= end:
+        cid = bytes(buf[pos : pos + 4])
+        (size,) = struct.unpack_from("<I", buf, pos + 4)
+        if cid == b"data":
+            return pos + 8, min(size, end - pos - 8)
+        pos += 8 + size + (size & 1)
+    raise wave.Error("no data chunk")
+
+
+def _transcribe_audio_file(path: str | io.BytesIO) -> str:
+    if not isinstance(path, str):
+        with wave.open(path, "rb") as wf:
+            return _recognize_pcm(wf.getframerate(), _wave_chunks(wf))
+
+    # Files: validate/read the header with wave, then slice PCM straight out of
+    # an mmap (one copy per block, no file-object reads).
+    with wave.open(path, "rb") as wf:
+        rate = wf.getframerate()
+        block = _PCM_CHUNK_FRAMES * wf.getsampwidth() * wf.getnchannels()
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            off, length = _wav_data_span(mm)
+            end = off + length
+            return _recognize_pcm(rate, (mm[i : min(i + block, end)] for i in range(off, end, block)))
+        finally:
+            mm.close()
+
+
+def _transcribe_compressed_av(src: str | io.BytesIO) -> str:
+    """
+    Decode + resample (s16 / mono / 16 kHz) in-process with PyAV and feed the PCM
+    straight to Vosk: no ffmpeg fork, no temp WAV.
+    """
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+
+    def frames() -> Iterable[bytes]:
+        with av.open(src) as container:
+            for frame in container.decode(audio=0):
+                for out in resampler.resample(frame):
+                    yield out.to_ndarray().tobytes()
+        for out in resampler.resample(None):
+            yield out.to_ndarray().tobytes()
+
+    def chunks() -> Iterable[bytes]:
+        # Decoded frames are ~1k samples; coalesce to _PCM_CHUNK_FRAMES (s16 = 2 bytes each).
+        buf = bytearray()
+        for data in frames():
+            buf += data
+            if len(buf) >= _PCM_CHUNK_FRAMES * 2:
+                yield bytes(buf)
+                buf.clear()
+        if buf:
+            yield bytes(buf)
+
+    return _recognize_pcm(16000, chunks())
 
 
 def _is_mp3_bytes(raw: bytes) -> bool:
@@ -74,37 +205,59 @@ def _is_mp3_bytes(raw: bytes) -> bool:
     return b0 == 0xFF and b1 in (0xFB, 0xF3, 0xF2)
 
 
-def _convert_to_wav(src_path: str) -> tuple[bool, str, str]:
+def _is_mp3_b64(b64: str | bytes) -> bool:
     """
-    Convert audio file at src_path to a temporary WAV (16k mono).
-    Returns (ok, wav_path, error).
+    _is_mp3_bytes on the first 6 decoded bytes only (8 base64 chars), so the
+    format is known before the full payload is decoded.
     """
-    dst = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    dst_path = dst.name
-    dst.close()
+    try:
+        head = base64.b64decode(b64[:8], validate=True)
+    except Exception:
+        return False
+    return _is_mp3_bytes(head)
 
+
+def _ffmpeg_to_pcm(src: str | bytes) -> tuple[bool, bytes, str]:
+    """
+    Decode audio to raw s16le 16 kHz mono with ffmpeg over pipes (no temp files).
+    src is a file path, or the encoded bytes themselves (sent on stdin).
+    Returns (ok, pcm, error).
+    """
+    from_stdin = isinstance(src, (bytes, bytearray))
     cmd = [
         "ffmpeg",
-        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
         "-i",
-        src_path,
+        "pipe:0" if from_stdin else src,
         "-ar",
         "16000",
         "-ac",
         "1",
         "-f",
-        "wav",
-        dst_path,
+        "s16le",
+        "pipe:1",
     ]
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)  # noqa: S603
+    proc = subprocess.run(  # noqa: S603
+        cmd,
+        input=src if from_stdin else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
     if proc.returncode != 0:
         err = proc.stderr.decode("utf-8", errors="ignore")[:200]
-        try:
-            os.remove(dst_path)
-        except Exception:
-            pass
-        return False, "", f"ffmpeg convert failed: {err or 'unknown error'}"
-    return True, dst_path, ""
+        return False, b"", f"ffmpeg convert failed: {err or 'unknown error'}"
+    return True, proc.stdout, ""
+
+
+def _transcribe_ffmpeg(src: str | bytes) -> Tuple[bool, str, str]:
+    ok_conv, pcm, err = _ffmpeg_to_pcm(src)
+    if not ok_conv:
+        return False, "", err
+    step = _PCM_CHUNK_FRAMES * 2
+    text = _recognize_pcm(16000, (pcm[i : i + step] for i in range(0, len(pcm), step)))
+    return (bool(text), text, "no speech detected" if not text else "")
 
 
 def _transcribe_from_payload(payload: Dict[str, Any]) -> Tuple[bool, str, str]:
@@ -113,58 +266,39 @@ def _transcribe_from_payload(payload: Dict[str, Any]) -> Tuple[bool, str, str]:
     Accepts:
       - audio_b64 / audio_base64: base64-encoded wav/pcm audio
       - audio_path: filesystem path to a wav file
-      - audio_path pointing to mp3 will be converted to wav (requires ffmpeg)
+      - mp3 (either form) is decoded in-process with PyAV when installed,
+        otherwise by ffmpeg over pipes
+    Everything stays in memory; nothing is written to disk.
     """
     audio_b64 = (payload or {}).get("audio_b64") or (payload or {}).get("audio_base64")
     audio_path = (payload or {}).get("audio_path")
 
     if audio_b64:
+        is_mp3 = _is_mp3_b64(audio_b64)
         try:
             raw = base64.b64decode(audio_b64, validate=True)
         except Exception as exc:
             return False, "", f"invalid audio_b64: {exc}"
-        suffix = ".mp3" if _is_mp3_bytes(raw) else ".wav"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(raw)
-            tmp_path = tmp.name
-        wav_path = tmp_path
-        cleanup_paths = [tmp_path]
         try:
-            if suffix == ".mp3":
-                ok_conv, wav_path, err = _convert_to_wav(tmp_path)
-                if not ok_conv:
-                    return False, "", err
-                cleanup_paths.append(wav_path)
-
-            text = _transcribe_audio_file(wav_path)
+            if not is_mp3:
+                text = _transcribe_audio_file(io.BytesIO(raw))
+            elif av is not None:
+                text = _transcribe_compressed_av(io.BytesIO(raw))
+            else:
+                return _transcribe_ffmpeg(raw)
             return (bool(text), text, "no speech detected" if not text else "")
         except Exception as exc:  # pragma: no cover - decoding errors
             return False, "", f"transcription failed: {exc}"
-        finally:
-            for p in cleanup_paths:
-                try:
-                    os.remove(p)
-                except Exception:
-                    pass
 
     if audio_path:
         try:
-            path = audio_path
-            cleanup_paths = []
-            if str(audio_path).lower().endswith(".mp3"):
-                ok_conv, wav_path, err = _convert_to_wav(audio_path)
-                if not ok_conv:
-                    return False, "", err
-                path = wav_path
-                cleanup_paths.append(wav_path)
-
-            text = _transcribe_audio_file(path)
-            # remove temp conversion if any
-            for p in cleanup_paths:
-                try:
-                    os.remove(p)
-                except Exception:
-                    pass
+            path = str(audio_path)
+            if not path.lower().endswith(".mp3"):
+                text = _transcribe_audio_file(path)
+            elif av is not None:
+                text = _transcribe_compressed_av(path)
+            else:
+                return _transcribe_ffmpeg(path)
             return (bool(text), text, "no speech detected" if not text else "")
         except Exception as exc:
             return False, "", f"transcription failed: {exc}"
@@ -172,11 +306,19 @@ def _transcribe_from_payload(payload: Dict[str, Any]) -> Tuple[bool, str, str]:
     return False, "", "no audio provided"
 
 
-def start_planner_service(host: str = "0.0.0.0", port: int = 8091) -> HTTPServer:
+def start_planner_service(host: str = "0.0.0.0", port: int = 8091) -> ThreadingHTTPServer:
     agent = Agent()  
+    try:
+        _load_vosk_model()
+    except Exception as exc:
+        # Transcript-only requests still work; audio requests retry the load.
+        print(f"[planner] vosk model not loaded: {exc}")
     temperature = float(os.environ.get("PLANNER_TEMPERATURE", "0.0"))
 
     class Handler(BaseHTTPRequestHandler):
+        # Keep-alive: every response carries Content-Length or is chunked (SSE).
+        protocol_version = "HTTP/1.1"
+
         def _set_cors(self):
             self.send_header("Access-Control-Allow-Origin", "*")
             self.send_header("Access-Control-Allow-Headers", "Content-Type, X-Planner-Token")
@@ -185,47 +327,76 @@ def start_planner_service(host: str = "0.0.0.0", port: int = 8091) -> HTTPServer
         def do_OPTIONS(self): 
             self.send_response(200)
             self._set_cors()
+            self.send_header("Content-Length", "0")
             self.end_headers()
 
+        # Set per request once SSE headers are out; _json then ends the stream.
+        _sse = False
+
+        def _sse_begin(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self._set_cors()
+            self.end_headers()
+            self._sse = True
+
+        def _sse_event(self, obj: Dict[str, Any]):
+            data = b"data: " + dumps_bytes(obj) + b"\n\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
         def _json(self, code: int, obj: Dict[str, Any]):
-            data = json.dumps(obj).encode("utf-8")
+            if self._sse:
+                # Headers already went out as 200; carry the real status in the event.
+                self._sse_event({**obj, "status": code})
+                self.wfile.write(b"0\r\n\r\n")
+                self._sse = False
+                return
+            data = dumps_bytes(obj)
             self.send_response(code)
             self.send_header("Content-Type", "application/json")
             self.send_header("Content-Length", str(len(data)))
+            self.send_header("Connection", "close" if self.close_connection else "keep-alive")
             self._set_cors()
             self.end_headers()
             self.wfile.write(data)
 
         def do_POST(self):  
+            # Always drain the body so the kept-alive connection stays in sync.
+            length = int(self.headers.get("Content-Length", "0"))
+            if length > _MAX_BODY:
+                # Body is left unread, so this connection can't be reused.
+                self.close_connection = True
+                return self._json(413, {"ok": False, "error": "payload too large"})
+            body = self.rfile.read(length) if length > 0 else b"{}"
+
+            self._sse = False
+            stream = "text/event-stream" in (self.headers.get("Accept") or "")
+
             if self.path.rstrip("/") != "/plan":
                 return self._json(404, {"ok": False, "error": "not found"})
 
-
-            length = int(self.headers.get("Content-Length", "0"))
-            body = self.rfile.read(length) if length > 0 else b"{}"
             try:
-                payload = json.loads(body.decode("utf-8") or "{}")
+                payload = loads(body or b"{}")
             except Exception:
                 payload = {}
 
             transcript = (payload.get("transcript") or "").strip()
             context = payload.get("context") or {}
 
-            # Always use MCP-defined tools; ignore caller-provided tools to avoid drift.
-            tool_defs = DEFAULT_PLANNER_TOOLS
-            tool_names = [t.get("name") for t in tool_defs if isinstance(t, dict) and t.get("name")]
-
             if not transcript:
-                ok, transcript, terr = _transcribe_from_payload(payload)
+                with _transcribe_slots:
+                    ok, transcript, terr = _transcribe_from_payload(payload)
                 if not ok or not transcript:
                     return self._json(400, {"ok": False, "error": terr or "transcript required"})
 
-            allowed_tools: Set[str] = set(tool_names)
-
+            allowed_tools = _ALLOWED_TOOLS
             user_prompt = build_user_prompt(
                 transcript,
                 context if isinstance(context, dict) else {},
-                tool_defs, 
+                _TOOLS_JSON,
             )
 
             # 1) call LLM
@@ -237,56 +408,77 @@ def start_planner_service(host: str = "0.0.0.0", port: int = 8091) -> HTTPServer
             if not llm_text:
                 return self._json(502, {"ok": False, "error": "empty llm response"})
 
-            # 2) parse JSON or fall back to chat
-            plan_obj = try_parse_json(llm_text)
-            if plan_obj is None:
-                if _looks_like_plan(llm_text):
-                    strict_prompt = (
-                        f"{user_prompt}\n\n"
-                        "Return ONLY valid MCP Plan JSON v1. No code fences, no Markdown, no commentary. "
-                        "Keep it to a single JSON object with goal_type/tool/payload (no steps array). "
-                        "Example format:\n"
-                        "{\"version\":\"mcp.plan.v1\",\"goal_type\":\"FIND_OBJECT\",\"tool\":\"approach_object\",\"payload\":{\"object\":\"bottle\"}}"
-                    )
-                    llm_resp = agent.respond(strict_prompt, system_prompt=SYSTEM_PROMPT, temperature=0.0)
-                    llm_text = (llm_resp.text or "").strip()
-                    plan_obj = try_parse_json(llm_text)
-                    if plan_obj is None:
-                        return self._json(
-                            200,
-                            {
-                                "ok": False,
-                                "error": "planner returned non-json",
-                                "raw": llm_resp.text[:800],
-                            },
+            if stream:
+                # First byte after one LLM call, not after the whole reprompt/repair chain.
+                self._sse_begin()
+                self._sse_event({"stage": "llm1_done"})
+
+            try:
+                # 2) parse JSON or fall back to chat
+                plan_obj = try_parse_json(llm_text)
+                if plan_obj is None:
+                    plan_hint = _PLAN_INTENT_RE.search(transcript) is not None
+                    short_chat = not plan_hint and len(transcript) <= _CHAT_MAX_CHARS
+                    if _looks_like_plan(llm_text) and not short_chat:
+                        strict_prompt = (
+                            f"{user_prompt}\n\n"
+                            "Return ONLY valid MCP Plan JSON v1. No code fences, no Markdown, no commentary. "
+                            "Keep it to a single JSON object with goal_type/tool/payload (no steps array). "
+                            "Example format:\n"
+                            "{\"version\":\"mcp.plan.v1\",\"goal_type\":\"FIND_OBJECT\",\"tool\":\"approach_object\",\"payload\":{\"object\":\"bottle\"}}"
                         )
-                else:
-                    # Treat as a normal chat reply for out-of-scope requests.
-                    return self._json(200, {"ok": True, "mode": "chat", "reply": llm_text})
-
-            # 3) validate plan
-            ok, err = validate_plan(plan_obj, allowed_tools)
-            if not ok:
-                repair_prompt = (
-                    "Your previous output failed validation.\n"
-                    f"Error: {err}\n\n"
-                    "Return ONLY corrected MCP Plan JSON v1 that passes validation. No extra text.\n\n"
-                    f"Previous JSON:\n{json.dumps(plan_obj)}"
-                )
-                llm2 = agent.respond(repair_prompt, system_prompt=SYSTEM_PROMPT, temperature=0.0)
-                plan2 = try_parse_json(llm2.text) or plan_obj
-                ok2, err2 = validate_plan(plan2, allowed_tools)
-                if not ok2:
-                    return self._json(200, {"ok": False, "error": f"invalid plan: {err2}", "plan": plan2})
-
-                return self._json(200, {"ok": True, "mode": "plan", "plan": plan2})
-
-            return self._json(200, {"ok": True, "mode": "plan", "plan": plan_obj})
+                        llm_resp = agent.respond(strict_prompt, system_prompt=SYSTEM_PROMPT, temperature=0.0)
+                        llm_text = (llm_resp.text or "").strip()
+                        plan_obj = try_parse_json(llm_text)
+                        if plan_obj is None:
+                            return self._json(
+                                200,
+                                {
+                                    "ok": False,
+                                    "error": "planner returned non-json",
+                                    "raw": llm_resp.text[:800],
+                                },
+                            )
+                    else:
+                        # Treat as a normal chat reply for out-of-scope requests.
+                        return self._json(200, {"ok": True, "mode": "chat", "reply": llm_text})
+
+                # 3) validate plan (local repair first; the LLM repair is a full round-trip)
+                ok, err = validate_plan(plan_obj, allowed_tools)
+                if not ok:
+                    repaired = repair_plan(plan_obj, allowed_tools)
+                    if validate_plan(repaired, allowed_tools)[0]:
+                        return self._json(200, {"ok": True, "mode": "plan", "plan": repaired})
+
+                    repair_prompt = (
+                        "Your previous output failed validation.\n"
+                        f"Error: {err}\n\n"
+                        "Return ONLY corrected MCP Plan JSON v1 that passes validation. No extra text.\n\n"
+                        f"Previous JSON:\n{llm_text[:_REPAIR_ECHO_MAX]}"
+                    )
+                    llm2 = agent.respond(repair_prompt, system_prompt=SYSTEM_PROMPT, temperature=0.0)
+                    plan2 = try_parse_json(llm2.text) or plan_obj
+                    ok2, err2 = validate_plan(plan2, allowed_tools)
+                    if not ok2:
+                        return self._json(200, {"ok": False, "error": f"invalid plan: {err2}", "plan": plan2})
+
+                    return self._json(200, {"ok": True, "mode": "plan", "plan": plan2})
+
+                return self._json(200, {"ok": True, "mode": "plan", "plan": plan_obj})
+            except Exception as exc:
+                if not self._sse:
+                    raise
+                # The 200 and chunked headers are already out; close the stream with
+                # a final status event instead of leaving it truncated.
+                return self._json(500, {"ok": False, "error": f"planner failed: {exc}"})
 
         def log_message(self, fmt, *args):  # noqa: ANN001
             return  # silence
 
-    server = HTTPServer((host, port), Handler)
+    # One thread per request so a slow LLM call doesn't block other clients;
+    # the shared Agent pools its HTTP connections across threads.
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
     t = threading.Thread(target=server.serve_forever, daemon=True)
     t.start()
     print(f"[planner] HTTP POST on http://{host}:{port}/plan")
@@ -27,9 +27,13 @@ Rules:
 """
 
 
-def build_user_prompt(transcript: str, context: Dict[str, Any], tools: List[Dict[str, Any]]) -> str:
+def tools_prompt_json(tools: List[Dict[str, Any]]) -> str:
+    return json.dumps(tools or [], ensure_ascii=False, indent=2)
+
+
+def build_user_prompt(transcript: str, context: Dict[str, Any], tools_json: str) -> str:
+    """tools_json: output of tools_prompt_json(), serialized once by the caller."""
     ctx = json.dumps(context or {}, ensure_ascii=False)
-    tools_json = json.dumps(tools or [], ensure_ascii=False, indent=2)
 
     return (
         f"Transcript:\n{transcript.strip()}\n\n"
@@ -1,12 +1,31 @@
 # planner_service/validate.py
 from __future__ import annotations
 
-from typing import Any, Dict, List, Set, Tuple
+import copy
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+try:
+    import msgspec  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    msgspec = None
 
 
 VALID_GOALS = {"FIND_OBJECT", "FIND_PERSON", "ENROLL_PERSON"}
 VALID_ON_FAIL = {"stop", "continue"}
 
+# goal_type each single-action tool requires (see validate_plan)
+_TOOL_GOALS = {
+    "start_face_record": "ENROLL_PERSON",
+    "approach_person": "FIND_PERSON",
+    "approach_object": "FIND_OBJECT",
+}
+# payload key each single-action tool requires, and common LLM spellings of it
+_TOOL_PAYLOAD_KEYS = {
+    "start_face_record": ("name", ("person", "label", "target")),
+    "approach_person": ("name", ("person", "label", "target")),
+    "approach_object": ("object", ("name", "label", "target", "item")),
+}
+
 
 def _extract_action(plan: Dict[str, Any]) -> Tuple[str | None, Any]:
     tool = plan.get("tool")
@@ -24,6 +43,64 @@ def _non_empty_str(val: Any) -> bool:
     return isinstance(val, str) and bool(val.strip())
 
 
+if msgspec is not None:
+    # Structural schema for the steps tree, checked in C by msgspec.convert.
+    # Only an accelerator: anything it rejects (including case variants like
+    # type "TOOL" that the Python walker accepts) is re-checked by
+    # _validate_steps, which also produces the error message.
+
+    class ToolStep(msgspec.Struct, tag_field="type", tag="tool"):
+        name: str
+        args: Optional[Dict[str, Any]] = None
+        on_fail: Optional[str] = None
+        fallback: Optional[List["Step"]] = None
+
+    class SetStep(msgspec.Struct, tag_field="type", tag="set"):
+        var: str
+
+    class IfStep(msgspec.Struct, tag_field="type", tag="if"):
+        cond: Dict[str, Any]
+        then: List["Step"]
+        else_: List["Step"] = msgspec.field(name="else")
+
+    class WaitStep(msgspec.Struct, tag_field="type", tag="wait"):
+        cond: Dict[str, Any]
+        tick: Optional[List["Step"]] = None
+        refresh: Optional[List["Step"]] = None
+
+    Step = Union[ToolStep, SetStep, IfStep, WaitStep]
+
+
+def _fast_steps_ok(steps: List[Any], allowed_tools: Set[str]) -> bool:
+    """True when msgspec accepts the tree and every semantic check passes."""
+    if msgspec is None:
+        return False
+    try:
+        parsed = msgspec.convert(steps, type=List[Step])
+    except msgspec.ValidationError:
+        return False
+    stack = list(parsed)
+    while stack:
+        st = stack.pop()
+        if isinstance(st, ToolStep):
+            if st.name.strip() not in allowed_tools:
+                return False
+            if st.on_fail is not None and st.on_fail.strip().lower() not in VALID_ON_FAIL:
+                return False
+            if st.fallback:
+                stack.extend(st.fallback)
+        elif isinstance(st, SetStep):
+            if not st.var.strip():
+                return False
+        elif isinstance(st, IfStep):
+            stack.extend(st.then)
+            stack.extend(st.else_)
+        else:
+            stack.extend(st.tick or ())
+            stack.extend(st.refresh or ())
+    return True
+
+
 def validate_plan(plan: Dict[str, Any], allowed_tools: Set[str]) -> Tuple[bool, str]:
     if not isinstance(plan, dict):
         return False, "plan must be an object"
@@ -66,6 +143,8 @@ def validate_plan(plan: Dict[str, Any], allowed_tools: Set[str]) -> Tuple[bool,
     if not isinstance(steps, list) or len(steps) < 1:
         return False, "plan must include a tool/payload or non-empty steps"
 
+    if _fast_steps_ok(steps, allowed_tools):
+        return True, ""
     ok, err = _validate_steps(steps, allowed_tools, path="steps")
     if not ok:
         return False, err
@@ -73,91 +152,187 @@ def validate_plan(plan: Dict[str, Any], allowed_tools: Set[str]) -> Tuple[bool,
     return True, ""
 
 
-def _validate_steps(steps: List[Any], allowed_tools: Set[str], path: str) -> Tuple[bool, str]:
-    for i, step in enumerate(steps):
-        p = f"{path}[{i}]"
-        if not isinstance(step, dict):
-            return False, f"{p} must be an object"
+# A check returns (error, children): children are the nested step lists to
+# validate next, in order, as (steps, path).
+_Children = List[Tuple[List[Any], str]]
 
-        stype = (step.get("type") or "").strip().lower()
-        if stype == "tool":
-            ok, err = _validate_tool_step(step, allowed_tools, p)
-            if not ok:
-                return False, err
-
-        elif stype == "set":
-            var = step.get("var")
-            if not isinstance(var, str) or not var.strip():
-                return False, f"{p}: set step missing var"
-            # value can be anything, including "$vars.x"
-            # no further validation needed
-
-        elif stype == "if":
-            cond = step.get("cond")
-            if not isinstance(cond, dict):
-                return False, f"{p}: if step missing cond"
-            then_steps = step.get("then")
-            else_steps = step.get("else")
-            if not isinstance(then_steps, list) or not isinstance(else_steps, list):
-                return False, f"{p}: if then/else must be arrays"
-            ok, err = _validate_steps(then_steps, allowed_tools, f"{p}.then")
-            if not ok:
-                return False, err
-            ok, err = _validate_steps(else_steps, allowed_tools, f"{p}.else")
-            if not ok:
-                return False, err
-
-        elif stype == "wait":
-            cond = step.get("cond")
-            if not isinstance(cond, dict):
-                return False, f"{p}: wait step missing cond"
-            tick = step.get("tick", [])
-            refresh = step.get("refresh", [])
-            if tick is not None and not isinstance(tick, list):
-                return False, f"{p}: wait.tick must be an array"
-            if refresh is not None and not isinstance(refresh, list):
-                return False, f"{p}: wait.refresh must be an array"
-            if isinstance(tick, list):
-                ok, err = _validate_steps(tick, allowed_tools, f"{p}.tick")
-                if not ok:
-                    return False, err
-            if isinstance(refresh, list):
-                ok, err = _validate_steps(refresh, allowed_tools, f"{p}.refresh")
-                if not ok:
-                    return False, err
 
-        else:
-            return False, f"{p}: unknown step type '{stype}'"
+def _check_set_step(step: Dict[str, Any], allowed_tools: Set[str], path: str) -> Tuple[str, _Children]:
+    var = step.get("var")
+    if not isinstance(var, str) or not var.strip():
+        return f"{path}: set step missing var", []
+    # value can be anything, including "$vars.x"
+    return "", []
+
+
+def _check_if_step(step: Dict[str, Any], allowed_tools: Set[str], path: str) -> Tuple[str, _Children]:
+    if not isinstance(step.get("cond"), dict):
+        return f"{path}: if step missing cond", []
+    then_steps = step.get("then")
+    else_steps = step.get("else")
+    if not isinstance(then_steps, list) or not isinstance(else_steps, list):
+        return f"{path}: if then/else must be arrays", []
+    return "", [(then_steps, f"{path}.then"), (else_steps, f"{path}.else")]
 
-    return True, ""
 
+def _check_wait_step(step: Dict[str, Any], allowed_tools: Set[str], path: str) -> Tuple[str, _Children]:
+    if not isinstance(step.get("cond"), dict):
+        return f"{path}: wait step missing cond", []
+    tick = step.get("tick", [])
+    refresh = step.get("refresh", [])
+    if tick is not None and not isinstance(tick, list):
+        return f"{path}: wait.tick must be an array", []
+    if refresh is not None and not isinstance(refresh, list):
+        return f"{path}: wait.refresh must be an array", []
+    children: _Children = []
+    if tick:
+        children.append((tick, f"{path}.tick"))
+    if refresh:
+        children.append((refresh, f"{path}.refresh"))
+    return "", children
 
-def _validate_tool_step(step: Dict[str, Any], allowed_tools: Set[str], path: str) -> Tuple[bool, str]:
+
+def _check_tool_step(step: Dict[str, Any], allowed_tools: Set[str], path: str) -> Tuple[str, _Children]:
     name = step.get("name")
     if not isinstance(name, str) or not name.strip():
-        return False, f"{path}: tool step missing name"
+        return f"{path}: tool step missing name", []
     name = name.strip()
     if name not in allowed_tools:
-        return False, f"{path}: tool '{name}' not in allowed tools"
+        return f"{path}: tool '{name}' not in allowed tools", []
 
     args = step.get("args", {})
     if args is None:
         step["args"] = {}
     elif not isinstance(args, dict):
-        return False, f"{path}: tool args must be an object"
+        return f"{path}: tool args must be an object", []
 
     on_fail = step.get("on_fail")
     if on_fail is not None:
         if not isinstance(on_fail, str) or on_fail.strip().lower() not in VALID_ON_FAIL:
-            return False, f"{path}: on_fail must be 'stop' or 'continue'"
+            return f"{path}: on_fail must be 'stop' or 'continue'", []
 
     fb = step.get("fallback")
-    if fb is not None and not isinstance(fb, list):
-        return False, f"{path}: fallback must be an array"
-    
-    if isinstance(fb, list):
-        ok, err = _validate_steps(fb, allowed_tools, f"{path}.fallback")
-        if not ok:
+    if fb is None:
+        return "", []
+    if not isinstance(fb, list):
+        return f"{path}: fallback must be an array", []
+    return "", [(fb, f"{path}.fallback")]
+
+
+_STEP_CHECKS = {
+    "tool": _check_tool_step,
+    "set": _check_set_step,
+    "if": _check_if_step,
+    "wait": _check_wait_step,
+}
+
+
+def _validate_steps(steps: List[Any], allowed_tools: Set[str], path: str) -> Tuple[bool, str]:
+    """
+    Depth-first, same order as the nesting (so the first error reported is the
+    same one a recursive walk would hit), using an explicit stack of iterators.
+    """
+    stack = [(iter(enumerate(steps)), path)]
+    while stack:
+        it, base = stack[-1]
+        nxt = next(it, None)
+        if nxt is None:
+            stack.pop()
+            continue
+        i, step = nxt
+        p = f"{base}[{i}]"
+        if not isinstance(step, dict):
+            return False, f"{p} must be an object"
+
+        # Canonical lowercase types hit directly; normalize only on a miss.
+        stype = step.get("type")
+        check = _STEP_CHECKS.get(stype) if isinstance(stype, str) else None
+        if check is None:
+            stype = (stype or "").strip().lower()
+            check = _STEP_CHECKS.get(stype)
+            if check is None:
+                return False, f"{p}: unknown step type '{stype}'"
+        err, children = check(step, allowed_tools, p)
+        if err:
             return False, err
+        # Push in reverse so the first child list is walked first.
+        for child_steps, child_path in reversed(children):
+            stack.append((iter(enumerate(child_steps)), child_path))
 
     return True, ""
+
+
+def _tool_key(name: str) -> str:
+    return name.strip().lower().replace("-", "_").replace(" ", "_")
+
+
+def _match_tool(name: Any, allowed_tools: Set[str]) -> Optional[str]:
+    if not isinstance(name, str) or not name.strip():
+        return None
+    if name in allowed_tools:
+        return name
+    key = _tool_key(name)
+    for t in allowed_tools:
+        if _tool_key(t) == key:
+            return t
+    return None
+
+
+def repair_plan(plan: Dict[str, Any], allowed_tools: Set[str]) -> Dict[str, Any]:
+    """
+    Cheap local fixes for common near-miss LLM plans, tried before paying for
+    another LLM round-trip: missing version, goal_type casing / inferable from
+    the tool, tool names differing only in case or separators, aliased payload
+    keys and explicit nulls on optional step fields. Returns a repaired copy;
+    callers must still run validate_plan on it.
+    """
+    if not isinstance(plan, dict):
+        return plan
+    plan = copy.deepcopy(plan)
+
+    if plan.get("version") is None:
+        plan["version"] = "mcp.plan.v1"
+
+    goal = plan.get("goal_type")
+    if isinstance(goal, str) and goal.strip().upper() in VALID_GOALS:
+        plan["goal_type"] = goal = goal.strip().upper()
+
+    action = plan.get("action") if isinstance(plan.get("action"), dict) else None
+    holder = action if action is not None and (action.get("tool") or action.get("name")) else plan
+    tool_field = "tool" if holder.get("tool") else "name"
+    tool = _match_tool(holder.get(tool_field), allowed_tools)
+    if tool:
+        holder[tool_field] = tool
+        if goal not in VALID_GOALS and tool in _TOOL_GOALS:
+            plan["goal_type"] = _TOOL_GOALS[tool]
+
+        payload_field = "payload" if holder is plan or "payload" in holder else "args"
+        payload = holder.get(payload_field)
+        if isinstance(payload, dict) and tool in _TOOL_PAYLOAD_KEYS:
+            key, aliases = _TOOL_PAYLOAD_KEYS[tool]
+            if not _non_empty_str(payload.get(key)):
+                for alias in aliases:
+                    if _non_empty_str(payload.get(alias)):
+                        payload[key] = payload.pop(alias)
+                        break
+
+    steps = plan.get("steps")
+    if isinstance(steps, list):
+        _repair_steps(steps, allowed_tools)
+    return plan
+
+
+def _repair_steps(steps: List[Any], allowed_tools: Set[str]) -> None:
+    for step in steps:
+        if not isinstance(step, dict):
+            continue
+        for k in ("on_fail", "fallback", "tick", "refresh"):
+            if k in step and step[k] is None:
+                del step[k]
+        if step.get("type") == "tool" or "name" in step:
+            tool = _match_tool(step.get("name"), allowed_tools)
+            if tool:
+                step["name"] = tool
+        for k in ("then", "else", "tick", "refresh", "fallback"):
+            if isinstance(step.get(k), list):
+                _repair_steps(step[k], allowed_tools)
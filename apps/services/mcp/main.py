@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-import time
+import signal
+import threading
 
 from .config import McpAppConfig
 from .container import McpContainer
@@ -17,11 +18,11 @@ def main() -> int:
     print(f"[mcp] Planner   : http://{cfg.planner.host}:{cfg.planner.port}/plan")
     print("")
 
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
     try:
-        while True:
-            time.sleep(0.5)
-    except KeyboardInterrupt:
-        pass
+        stop.wait()
     finally:
         container.stop()
 
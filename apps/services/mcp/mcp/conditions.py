@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
 
 from .resolver import resolve_value
 
@@ -9,6 +11,69 @@ def _truthy(x: Any) -> bool:
     return bool(x)
 
 
+# == / != compare raw values; ordering ops compare as floats.
+_EQ_OPS: Dict[str, Callable[[Any, Any], bool]] = {"==": operator.eq, "!=": operator.ne}
+_ORD_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+@lru_cache(maxsize=64)
+def _norm_op(op: str) -> str:
+    return op.strip().lower()
+
+
+def _resolve(v: Any, state: Dict[str, Any], memo: Dict[str, Any]) -> Any:
+    # Only "$..." refs walk the state; memoize them for one eval_cond call.
+    if not (isinstance(v, str) and v.startswith("$")):
+        return v
+    if v in memo:
+        return memo[v]
+    r = memo[v] = resolve_value(v, state)
+    return r
+
+
+def _eval_and(cond: Dict[str, Any], state: Dict[str, Any], memo: Dict[str, Any]) -> bool:
+    conds = cond.get("conds")
+    if not isinstance(conds, list):
+        # allow legacy: left/right as conditions
+        left = cond.get("left")
+        right = cond.get("right")
+        return _truthy(_eval(left, state, memo)) and _truthy(_eval(right, state, memo))  # type: ignore
+    return all(_eval(c, state, memo) for c in conds if isinstance(c, dict))
+
+
+def _eval_or(cond: Dict[str, Any], state: Dict[str, Any], memo: Dict[str, Any]) -> bool:
+    conds = cond.get("conds")
+    if not isinstance(conds, list):
+        left = cond.get("left")
+        right = cond.get("right")
+        return _truthy(_eval(left, state, memo)) or _truthy(_eval(right, state, memo))  # type: ignore
+    return any(_eval(c, state, memo) for c in conds if isinstance(c, dict))
+
+
+def _eval_not(cond: Dict[str, Any], state: Dict[str, Any], memo: Dict[str, Any]) -> bool:
+    inner = cond.get("cond")
+    if not isinstance(inner, dict):
+        return False
+    return not _eval(inner, state, memo)
+
+
+def _eval_exists(cond: Dict[str, Any], state: Dict[str, Any], memo: Dict[str, Any]) -> bool:
+    return _resolve(cond.get("value"), state, memo) is not None
+
+
+_LOGIC_OPS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any]], bool]] = {
+    "and": _eval_and,
+    "or": _eval_or,
+    "not": _eval_not,
+    "exists": _eval_exists,
+}
+
+
 def eval_cond(cond: Dict[str, Any], state: Dict[str, Any]) -> bool:
     """
     Supported:
@@ -19,6 +84,10 @@ def eval_cond(cond: Dict[str, Any], state: Dict[str, Any]) -> bool:
       {"op":"exists","value": ...}
     Values can be "$vars.x", "$kb.found", etc.
     """
+    return _eval(cond, state, {})
+
+
+def _eval(cond: Dict[str, Any], state: Dict[str, Any], memo: Dict[str, Any]) -> bool:
     if not isinstance(cond, dict):
         return False
 
@@ -26,53 +95,23 @@ def eval_cond(cond: Dict[str, Any], state: Dict[str, Any]) -> bool:
     if not isinstance(op, str):
         return False
 
-    op = op.strip().lower()
-
-    if op == "and":
-        conds = cond.get("conds")
-        if not isinstance(conds, list):
-            # allow legacy: left/right as conditions
-            left = cond.get("left")
-            right = cond.get("right")
-            return _truthy(eval_cond(left, state)) and _truthy(eval_cond(right, state))  # type: ignore
-        return all(eval_cond(c, state) for c in conds if isinstance(c, dict))
-
-    if op == "or":
-        conds = cond.get("conds")
-        if not isinstance(conds, list):
-            left = cond.get("left")
-            right = cond.get("right")
-            return _truthy(eval_cond(left, state)) or _truthy(eval_cond(right, state))  # type: ignore
-        return any(eval_cond(c, state) for c in conds if isinstance(c, dict))
-
-    if op == "not":
-        inner = cond.get("cond")
-        if not isinstance(inner, dict):
-            return False
-        return not eval_cond(inner, state)
-
-    if op == "exists":
-        val = resolve_value(cond.get("value"), state)
-        return val is not None
+    op = _norm_op(op)
+
+    logic = _LOGIC_OPS.get(op)
+    if logic is not None:
+        return logic(cond, state, memo)
 
     # comparisons
-    left = resolve_value(cond.get("left"), state)
-    right = resolve_value(cond.get("right"), state)
+    cmp_eq = _EQ_OPS.get(op)
+    cmp_ord = _ORD_OPS.get(op) if cmp_eq is None else None
+    if cmp_eq is None and cmp_ord is None:
+        return False
 
+    left = _resolve(cond.get("left"), state, memo)
+    right = _resolve(cond.get("right"), state, memo)
     try:
-        if op == "==":
-            return left == right
-        if op == "!=":
-            return left != right
-        if op == ">":
-            return float(left) > float(right)
-        if op == ">=":
-            return float(left) >= float(right)
-        if op == "<":
-            return float(left) < float(right)
-        if op == "<=":
-            return float(left) <= float(right)
+        if cmp_eq is not None:
+            return bool(cmp_eq(left, right))
+        return bool(cmp_ord(float(left), float(right)))
     except Exception:
         return False
-
-    return False
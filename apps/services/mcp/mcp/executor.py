@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import sys
 import threading
 import time
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Set, Tuple
 
 from .conditions import eval_cond
-from .resolver import resolve_args, resolve_value
+from .resolver import CompiledArgs, compile_args, materialize_args, resolve_value
 from .run_store import McpRunStep, McpRunState, McpRunStore
 
 ToolInvoker = Callable[[str, Dict[str, Any]], Dict[str, Any]]
@@ -19,6 +23,52 @@ def _on_fail_mode(step: Dict[str, Any]) -> str:
     return mode if mode in ("stop", "continue") else "stop"
 
 
+def _step_meta(step: Dict[str, Any]) -> Tuple[str, str]:
+    stype = step.get("type")
+    stype = stype.strip().lower() if isinstance(stype, str) else ""
+    return sys.intern(stype), _on_fail_mode(step)
+
+
+def _prepare_steps(steps: List[Dict[str, Any]], meta: Dict[int, Tuple[str, str]]) -> None:
+    """
+    Normalize type/on_fail once for every step in the tree, keyed by id(step),
+    so tick/refresh bodies re-run by wait loops don't re-parse them.
+    """
+    stack = [steps]
+    while stack:
+        for step in stack.pop():
+            if not isinstance(step, dict):
+                continue
+            meta[id(step)] = _step_meta(step)
+            for key in ("then", "else", "fallback", "tick", "refresh"):
+                child = step.get(key)
+                if isinstance(child, list):
+                    stack.append(child)
+
+
+def _record_result(
+    st: McpRunState,
+    state: Dict[str, Any],
+    res: Dict[str, Any],
+    *,
+    save_pairs: Tuple[Tuple[str, Any], ...] = (),
+    var_pairs: Tuple[Tuple[str, Any], ...] = (),
+) -> None:
+    """
+    The single place a step publishes results: save/vars writes, last, the
+    state_version bump and the wake-up for waiters, all in one critical section.
+    """
+    with st.state_cv:
+        for k, v in save_pairs:
+            st.save[k] = v
+        for k, v in var_pairs:
+            st.vars[k] = v
+        st.last = res
+        state["last"] = res
+        st.state_version += 1
+        st.state_cv.notify_all()
+
+
 def _simple_action_step(plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     tool = plan.get("tool")
     payload = plan.get("payload")
@@ -49,12 +99,28 @@ class McpExecutor:
         allow_tools: Optional[Set[str]] = None,
         max_steps: int = 20,
         per_step_timeout_s: float = 20.0,
+        max_workers: int = 8,
     ):
         self.store = store
         self.tool_invoker = tool_invoker
         self.allow_tools: Optional[Set[str]] = allow_tools
         self.max_steps = int(max_steps)
         self.per_step_timeout_s = float(per_step_timeout_s)
+        # Tool calls run on reused threads; a timed-out call keeps its worker until it returns.
+        self._pool = ThreadPoolExecutor(max_workers=int(max_workers), thread_name_prefix="mcp-tool")
+        # Compiled tool-args templates keyed by id(step["args"]); the args dict is kept
+        # alongside so its id can't be reused while cached.
+        self._args_cache: "OrderedDict[int, Tuple[Dict[str, Any], CompiledArgs]]" = OrderedDict()
+        self._args_cache_size = 1024
+        self._args_cache_lock = threading.Lock()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __del__(self) -> None:
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=False)
 
     def execute_plan(self, plan: Dict[str, Any], initial_state: Optional[Dict[str, Any]] = None) -> str:
         normalized_plan = self._normalize_plan(plan)
@@ -68,7 +134,7 @@ class McpExecutor:
         if not st:
             return
 
-        with self.store._lock:
+        with st.lock:
             st.status = "running"
             st.error = None
             st.finished_ts = None
@@ -105,6 +171,8 @@ class McpExecutor:
             self.store.finish(run_id, status="failed", error="plan missing executable steps")
             return
 
+        _prepare_steps(steps, st.step_meta)
+
         ok = self._exec_steps(st, steps, state, path="steps", max_steps=max_steps, per_step_timeout=per_step_timeout)
 
         if st.cancelled or st.status == "cancelled":
@@ -134,18 +202,19 @@ class McpExecutor:
             if not isinstance(step, dict):
                 return self._fail(st, f"invalid step at {path}[{idx}]")
 
-            if self._step_count(st) >= max_steps:
+            if st.step_total >= max_steps:
                 return self._fail(st, f"max_steps exceeded ({max_steps})")
 
-            step_type = (step.get("type") or "").strip().lower()
+            step_type, mode = st.step_meta.get(id(step)) or _step_meta(step)
             step_path = f"{path}[{idx}]"
 
-            ok, result = self._dispatch_step(st, step, state, path=step_path, max_steps=max_steps, per_step_timeout=per_step_timeout)
+            ok, result = self._dispatch_step(
+                st, step, state, step_type=step_type, path=step_path, max_steps=max_steps, per_step_timeout=per_step_timeout
+            )
 
             if ok:
                 continue
 
-            mode = _on_fail_mode(step)
             if mode == "stop":
                 if isinstance(result, dict) and result.get("error"):
                     st.error = str(result.get("error"))
@@ -162,11 +231,9 @@ class McpExecutor:
                     return False
 
             if isinstance(result, dict):
-                st.last = result
-                state["last"] = st.last
+                _record_result(st, state, result)
             else:
-                st.last = {"ok": False, "error": "step failed (soft)"}
-                state["last"] = st.last
+                _record_result(st, state, {"ok": False, "error": "step failed (soft)"})
 
         return True
 
@@ -176,25 +243,15 @@ class McpExecutor:
         step: Dict[str, Any],
         state: Dict[str, Any],
         *,
+        step_type: str,
         path: str,
         max_steps: int,
         per_step_timeout: float,
     ) -> Tuple[bool, Dict[str, Any]]:
-        step_type = (step.get("type") or "").strip().lower()
-
-        if step_type == "tool":
-            return self._exec_tool_step(st, step, state, path=path, per_step_timeout=per_step_timeout)
-
-        if step_type == "set":
-            return self._exec_set_step(st, step, state, path=path)
-
-        if step_type == "if":
-            return self._exec_if_step(st, step, state, path=path, max_steps=max_steps, per_step_timeout=per_step_timeout)
-
-        if step_type == "wait":
-            return self._exec_wait_step(st, step, state, path=path, max_steps=max_steps, per_step_timeout=per_step_timeout)
-
-        return False, {"ok": False, "error": f"unknown step type '{step_type}' at {path}"}
+        handler = self._STEP_HANDLERS.get(step_type)
+        if handler is None:
+            return False, {"ok": False, "error": f"unknown step type '{step_type}' at {path}"}
+        return handler(self, st, step, state, path=path, max_steps=max_steps, per_step_timeout=per_step_timeout)
 
     def _exec_tool_step(
         self,
@@ -203,6 +260,7 @@ class McpExecutor:
         state: Dict[str, Any],
         *,
         path: str,
+        max_steps: int,
         per_step_timeout: float,
     ) -> Tuple[bool, Dict[str, Any]]:
         name = step.get("name")
@@ -223,7 +281,7 @@ class McpExecutor:
             self._log_step(st, kind="tool", name=name, args={}, path=path, ok=False, result=res)
             return False, res
 
-        resolved_args = resolve_args(args, state)
+        resolved_args = materialize_args(self._compiled_args(args), state)
 
         started = time.time()
         result = self._call_with_timeout(name, resolved_args, timeout_s=per_step_timeout)
@@ -232,11 +290,11 @@ class McpExecutor:
         # Save results
         save_as = step.get("save_as")
         if isinstance(save_as, str) and save_as.strip():
-            st.save[save_as.strip()] = result
-        st.save[name] = result
+            save_pairs: Tuple[Tuple[str, Any], ...] = ((save_as.strip(), result), (name, result))
+        else:
+            save_pairs = ((name, result),)
 
-        st.last = result
-        state["last"] = result
+        _record_result(st, state, result, save_pairs=save_pairs)
 
         ok = not (isinstance(result, dict) and result.get("ok") is False)
 
@@ -253,7 +311,16 @@ class McpExecutor:
         )
         return ok, result
 
-    def _exec_set_step(self, st: McpRunState, step: Dict[str, Any], state: Dict[str, Any], *, path: str) -> Tuple[bool, Dict[str, Any]]:
+    def _exec_set_step(
+        self,
+        st: McpRunState,
+        step: Dict[str, Any],
+        state: Dict[str, Any],
+        *,
+        path: str,
+        max_steps: int,
+        per_step_timeout: float,
+    ) -> Tuple[bool, Dict[str, Any]]:
         var = step.get("var")
         if not isinstance(var, str) or not var.strip():
             res = {"ok": False, "error": f"set step missing var at {path}"}
@@ -261,11 +328,9 @@ class McpExecutor:
             return False, res
 
         value = resolve_value(step.get("value"), state)
-        st.vars[var.strip()] = value
         res = {"ok": True, "set": var.strip(), "value": value}
 
-        st.last = res
-        state["last"] = res
+        _record_result(st, state, res, var_pairs=((var.strip(), value),))
 
         self._log_step(st, kind="set", name=var.strip(), args={"value": value}, path=path, ok=True, result=res)
         return True, res
@@ -295,8 +360,7 @@ class McpExecutor:
 
         take_then = bool(eval_cond(cond, state))
         res = {"ok": True, "if": take_then}
-        st.last = res
-        state["last"] = res
+        _record_result(st, state, res)
 
         self._log_step(st, kind="if", name="if", args={"take_then": take_then}, path=path, ok=True, result=res)
 
@@ -331,22 +395,21 @@ class McpExecutor:
             self._log_step(st, kind="wait", name="wait", args={}, path=path, ok=False, result=res)
             return False, res
 
-        started = time.time()
+        # Monotonic deadline: wall-clock jumps must not cut short or extend the wait.
+        deadline_ns = time.monotonic_ns() + int(timeout_s * 1e9)
         self._log_step(st, kind="wait", name="wait", args={"timeout_s": timeout_s, "poll_s": poll_s}, path=path, ok=True, result={"ok": True, "wait": "started"})
 
-        while (time.time() - started) < timeout_s:
+        while time.monotonic_ns() < deadline_ns:
             if st.cancelled or st.status == "cancelled":
                 res = {"ok": False, "error": "cancelled"}
                 self._log_step(st, kind="wait", name="wait", args={}, path=path, ok=False, result=res)
-                st.last = res
-                state["last"] = res
+                _record_result(st, state, res)
                 return False, res
 
-            if self._step_count(st) >= max_steps:
+            if st.step_total >= max_steps:
                 res = {"ok": False, "error": f"max_steps exceeded ({max_steps}) during wait"}
                 self._log_step(st, kind="wait", name="wait", args={}, path=path, ok=False, result=res)
-                st.last = res
-                state["last"] = res
+                _record_result(st, state, res)
                 return False, res
 
             if tick_steps:
@@ -357,23 +420,42 @@ class McpExecutor:
                 if not self._exec_steps(st, refresh_steps, state, path=f"{path}.refresh", max_steps=max_steps, per_step_timeout=per_step_timeout):
                     return False, st.last if isinstance(st.last, dict) else {"ok": False, "error": "wait refresh failed"}
 
-            if eval_cond(cond, state):
+            if self._eval_wait_cond(st, cond, state):
                 res = {"ok": True, "wait": "satisfied"}
-                st.last = res
-                state["last"] = res
+                _record_result(st, state, res)
                 self._log_step(st, kind="wait", name="wait", args={}, path=path, ok=True, result=res)
                 return True, res
 
-            time.sleep(poll_s)
+            # Sleep until the next poll, or wake early on cancel / state change.
+            remaining_ns = deadline_ns - time.monotonic_ns()
+            if remaining_ns > 0:
+                with st.state_cv:
+                    st.state_cv.wait_for(lambda: st.cancelled, timeout=min(poll_s, remaining_ns / 1e9))
 
         res = {"ok": True, "wait": "timeout", "timeout_s": timeout_s}
-        st.last = res
-        state["last"] = res
+        _record_result(st, state, res)
         self._log_step(st, kind="wait", name="wait", args={}, path=path, ok=True, result=res)
         return True, res
 
-    def _step_count(self, st: McpRunState) -> int:
-        return len(st.steps)
+    # Step type -> handler; all four take the same keyword arguments.
+    _STEP_HANDLERS: ClassVar[Dict[str, Callable[..., Tuple[bool, Dict[str, Any]]]]] = {
+        "tool": _exec_tool_step,
+        "set": _exec_set_step,
+        "if": _exec_if_step,
+        "wait": _exec_wait_step,
+    }
+
+    def _eval_wait_cond(self, st: McpRunState, cond: Dict[str, Any], state: Dict[str, Any]) -> bool:
+        # Nothing the cond can see changes without a state_version bump, so an
+        # unchanged version means an unchanged answer.
+        key = (id(cond), st.state_version)
+        hit = st.cond_cache.get(key)
+        if hit is not None:
+            return hit
+        if len(st.cond_cache) >= 64:
+            st.cond_cache.clear()
+        out = st.cond_cache[key] = bool(eval_cond(cond, state))
+        return out
 
     def _fail(self, st: McpRunState, msg: str) -> bool:
         st.error = msg
@@ -392,16 +474,16 @@ class McpExecutor:
         started_ts: Optional[float] = None,
         ended_ts: Optional[float] = None,
     ) -> None:
-        if isinstance(result, dict) and "path" not in result:
-            result = dict(result)
-            result["path"] = path
-
-        with self.store._lock:
-            i = len(st.steps)
-            s = McpRunStep(
+        # Only the run's own thread logs steps, so no lock here; readers drain
+        # pending_steps into st.steps under st.lock.
+        i = st.step_total
+        st.step_total += 1
+        st.pending_steps.append(
+            McpRunStep(
                 i=i,
                 kind=kind,
                 name=name,
+                path=path,
                 args=args or {},
                 started_ts=started_ts,
                 ended_ts=ended_ts,
@@ -409,33 +491,43 @@ class McpExecutor:
                 result=result or {},
                 error=(result.get("error") if isinstance(result, dict) else None),
             )
-            st.steps.append(s)
+        )
+
+    def _compiled_args(self, args: Dict[str, Any]) -> CompiledArgs:
+        key = id(args)
+        with self._args_cache_lock:
+            hit = self._args_cache.get(key)
+            if hit is not None and hit[0] is args:
+                self._args_cache.move_to_end(key)
+                return hit[1]
+        compiled = compile_args(args)
+        with self._args_cache_lock:
+            self._args_cache[key] = (args, compiled)
+            self._args_cache.move_to_end(key)
+            while len(self._args_cache) > self._args_cache_size:
+                self._args_cache.popitem(last=False)
+        return compiled
+
+    def _invoke(self, tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            out = self.tool_invoker(tool, args)
+        except Exception as exc:
+            return {"ok": False, "error": str(exc)}
+        if not isinstance(out, dict):
+            return {"ok": False, "error": "tool returned non-dict"}
+        if "ok" not in out and "error" in out:
+            return {"ok": False, "error": out.get("error")}
+        if "ok" not in out:
+            return {"ok": True, **out}
+        return out
 
     def _call_with_timeout(self, tool: str, args: Dict[str, Any], *, timeout_s: float) -> Dict[str, Any]:
-        out: Dict[str, Any] = {"ok": False, "error": "timeout"}
-        done = threading.Event()
-
-        def worker() -> None:
-            nonlocal out
-            try:
-                out = self.tool_invoker(tool, args)
-                if not isinstance(out, dict):
-                    out = {"ok": False, "error": "tool returned non-dict"}
-                elif "ok" not in out and "error" in out:
-                    out = {"ok": False, "error": out.get("error")}
-                elif "ok" not in out:
-                    out = {"ok": True, **out}
-            except Exception as exc:
-                out = {"ok": False, "error": str(exc)}
-            finally:
-                done.set()
-
-        t = threading.Thread(target=worker, daemon=True)
-        t.start()
-        done.wait(timeout=timeout_s)
-        if not done.is_set():
+        fut = self._pool.submit(self._invoke, tool, args)
+        try:
+            return fut.result(timeout=timeout_s)
+        except FuturesTimeout:
+            fut.cancel()
             return {"ok": False, "error": f"tool timeout after {timeout_s}s"}
-        return out
 
     def _normalize_plan(self, plan: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """
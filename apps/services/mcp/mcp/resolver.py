@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+CompiledArgs = Tuple[Any, Tuple[Tuple[Tuple[Any, ...], str], ...]]
 
-def _get_path(obj: Any, path: str) -> Any:
-    cur = obj
-    for part in path.split("."):
-        if part == "":
-            continue
+
+def _walk(cur: Any, parts: Tuple[str, ...]) -> Any:
+    for part in parts:
         if isinstance(cur, dict):
             cur = cur.get(part)
         elif isinstance(cur, list):
@@ -20,6 +20,26 @@ def _get_path(obj: Any, path: str) -> Any:
     return cur
 
 
+@lru_cache(maxsize=4096)
+def _parse_ref(ref: str) -> Tuple[str, Optional[str], Tuple[str, ...]]:
+    """
+    "$vars.a.b" -> ("vars", None, ("a", "b"))
+    "$last.x"   -> ("last", None, ("x",))
+    "$kb.found" -> ("save", "kb", ("found",))
+    "$kb"       -> ("saved", "kb", ())   whole saved object
+    """
+    token = ref[1:]
+    if token.startswith("vars."):
+        return "vars", None, tuple(p for p in token[5:].split(".") if p)
+    if token.startswith("last."):
+        return "last", None, tuple(p for p in token[5:].split(".") if p)
+
+    dot = token.find(".")
+    if dot == -1:
+        return "saved", token, ()
+    return "save", token[:dot], tuple(p for p in token[dot + 1 :].split(".") if p)
+
+
 def resolve_ref(ref: str, state: Dict[str, Any]) -> Any:
     """
     Supports:
@@ -31,21 +51,15 @@ def resolve_ref(ref: str, state: Dict[str, Any]) -> Any:
     if not ref.startswith("$"):
         return ref
 
-    token = ref[1:]
-    if token.startswith("vars."):
-        return _get_path(state.get("vars", {}), token.removeprefix("vars."))
-    if token.startswith("last."):
-        return _get_path(state.get("last", {}), token.removeprefix("last."))
-
-    # default: "$<save_key>.<path>"
-    dot = token.find(".")
-    if dot == -1:
+    kind, save_key, parts = _parse_ref(ref)
+    if kind == "vars":
+        return _walk(state.get("vars", {}), parts)
+    if kind == "last":
+        return _walk(state.get("last", {}), parts)
+    if kind == "saved":
         # "$kb" returns the whole saved object if present
-        return state.get("save", {}).get(token)
-    save_key = token[:dot]
-    tail = token[dot + 1 :]
-    saved = state.get("save", {}).get(save_key, {})
-    return _get_path(saved, tail)
+        return state.get("save", {}).get(save_key)
+    return _walk(state.get("save", {}).get(save_key, {}), parts)
 
 
 def resolve_value(v: Any, state: Dict[str, Any]) -> Any:
@@ -54,9 +68,76 @@ def resolve_value(v: Any, state: Dict[str, Any]) -> Any:
     return v
 
 
-def resolve_args(args: Any, state: Dict[str, Any]) -> Any:
+def _has_refs(x: Any) -> bool:
+    # Explicit stack instead of recursive any(genexpr): no generator frame per container.
+    stack = [x]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            if node.startswith("$"):
+                return True
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return False
+
+
+def _resolve_args(args: Any, state: Dict[str, Any]) -> Any:
     if isinstance(args, dict):
-        return {k: resolve_args(v, state) for k, v in args.items()}
+        return {k: _resolve_args(v, state) for k, v in args.items()}
     if isinstance(args, list):
-        return [resolve_args(x, state) for x in args]
+        return [_resolve_args(x, state) for x in args]
     return resolve_value(args, state)
+
+
+def resolve_args(args: Any, state: Dict[str, Any]) -> Any:
+    # Pure-literal templates come back as-is, without rebuilding every container.
+    if not _has_refs(args):
+        return args
+    return _resolve_args(args, state)
+
+
+def compile_args(args: Any) -> CompiledArgs:
+    """
+    Split an args template once into a literal skeleton (refs blanked out) and
+    the (path, "$ref") substitutions to apply per call.
+    """
+    subs: List[Tuple[Tuple[Any, ...], str]] = []
+
+    def walk(node: Any, path: Tuple[Any, ...]) -> Any:
+        if isinstance(node, dict):
+            return {k: walk(v, path + (k,)) for k, v in node.items()}
+        if isinstance(node, list):
+            return [walk(x, path + (i,)) for i, x in enumerate(node)]
+        if isinstance(node, str) and node.startswith("$"):
+            subs.append((path, node))
+            return None
+        return node
+
+    return walk(args, ()), tuple(subs)
+
+
+def materialize_args(compiled: CompiledArgs, state: Dict[str, Any]) -> Any:
+    """
+    resolve_args() for a compiled template. Pure-literal templates return the
+    skeleton itself; otherwise only the containers on a substitution path are copied.
+    """
+    skeleton, subs = compiled
+    if not subs:
+        return skeleton
+    if subs[0][0] == ():
+        return resolve_ref(subs[0][1], state)
+
+    out = dict(skeleton) if isinstance(skeleton, dict) else list(skeleton)
+    copied = {id(out)}
+    for path, ref in subs:
+        cur = out
+        for key in path[:-1]:
+            nxt = cur[key]
+            if id(nxt) not in copied:
+                nxt = cur[key] = dict(nxt) if isinstance(nxt, dict) else list(nxt)
+                copied.add(id(nxt))
+            cur = nxt
+        cur[path[-1]] = resolve_ref(ref, state)
+    return out
@@ -3,15 +3,18 @@ from __future__ import annotations
 import threading
 import time
 import uuid
+from collections import deque
+from itertools import islice
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class McpRunStep:
     i: int
     kind: str
     name: str = ""
+    path: str = ""
     args: Dict[str, Any] = field(default_factory=dict)
     started_ts: Optional[float] = None
     ended_ts: Optional[float] = None
@@ -20,7 +23,7 @@ class McpRunStep:
     error: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class McpRunState:
     run_id: str
     created_ts: float
@@ -34,6 +37,29 @@ class McpRunState:
     error: Optional[str] = None
     finished_ts: Optional[float] = None
     cancelled: bool = False
+    # Guards this run's mutable fields; the store lock only covers the _runs dict.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    # Notified on every last/save/vars write and on cancel; wait steps sleep on it.
+    state_cv: threading.Condition = field(default_factory=threading.Condition, repr=False, compare=False)
+    # Bumped with every notify; keys the wait-condition cache below.
+    state_version: int = field(default=0, repr=False, compare=False)
+    cond_cache: Dict[Tuple[int, int], bool] = field(default_factory=dict, repr=False, compare=False)
+
+    # id(step) -> (normalized type, on_fail mode), filled once when the run starts.
+    step_meta: Dict[int, Tuple[str, str]] = field(default_factory=dict, repr=False, compare=False)
+    # Logged steps land here first (deque.append needs no lock); drain_steps() moves them.
+    pending_steps: Deque[McpRunStep] = field(default_factory=deque, repr=False, compare=False)
+    step_total: int = field(default=0, repr=False, compare=False)
+
+    def drain_steps(self) -> None:
+        """Move pending steps into steps; call with self.lock held."""
+        while self.pending_steps:
+            self.steps.append(self.pending_steps.popleft())
+
+    def notify_state(self) -> None:
+        with self.state_cv:
+            self.state_version += 1
+            self.state_cv.notify_all()
 
 
 class McpRunStore:
@@ -63,60 +89,69 @@ class McpRunStore:
             return self._runs.get(run_id)
 
     def cancel(self, run_id: str) -> bool:
-        with self._lock:
-            st = self._runs.get(run_id)
-            if not st:
-                return False
+        st = self.get(run_id)
+        if not st:
+            return False
+        with st.lock:
             st.cancelled = True
             if st.status == "running":
                 st.status = "cancelled"
                 st.finished_ts = time.time()
-            return True
+        st.notify_state()
+        return True
 
     def finish(self, run_id: str, *, status: str, error: Optional[str] = None) -> bool:
         if status not in ("done", "failed", "cancelled"):
             status = "failed"
-        with self._lock:
-            st = self._runs.get(run_id)
-            if not st:
-                return False
+        st = self.get(run_id)
+        if not st:
+            return False
+        with st.lock:
+            st.drain_steps()
             st.status = status
             st.error = error
             st.finished_ts = time.time()
             return True
 
     def to_dict(self, st: McpRunState) -> Dict[str, Any]:
-        with self._lock:
-            steps_out = [
-                {
-                    "i": s.i,
-                    "kind": s.kind,
-                    "name": s.name,
-                    "args": dict(s.args or {}),
-                    "started_ts": s.started_ts,
-                    "ended_ts": s.ended_ts,
-                    "ok": s.ok,
-                    "result": dict(s.result or {}),
-                    "error": s.error,
-                }
-                for s in st.steps
-            ]
-            return {
+        # Hold the lock only to drain and snapshot. Logged steps are never mutated
+        # after append, so they are read outside it and their args/result shared
+        # rather than copied.
+        with st.lock:
+            st.drain_steps()
+            steps = list(st.steps)
+            out = {
                 "run_id": st.run_id,
                 "created_ts": st.created_ts,
                 "status": st.status,
-                "plan": dict(st.plan or {}),
-                "initial_state": dict(st.initial_state or {}),
+                "plan": st.plan or {},
+                "initial_state": st.initial_state or {},
                 "vars": dict(st.vars or {}),
                 "save": dict(st.save or {}),
                 "last": dict(st.last or {}),
-                "steps": steps_out,
+                "steps": None,
                 "error": st.error,
                 "finished_ts": st.finished_ts,
                 "cancelled": st.cancelled,
             }
+        out["steps"] = [
+            {
+                "i": s.i,
+                "kind": s.kind,
+                "name": s.name,
+                "path": s.path,
+                "args": s.args or {},
+                "started_ts": s.started_ts,
+                "ended_ts": s.ended_ts,
+                "ok": s.ok,
+                "result": s.result or {},
+                "error": s.error,
+            }
+            for s in steps
+        ]
+        return out
 
     def list_ids(self, limit: int = 50) -> List[str]:
         with self._lock:
-            # return newest first
-            return list(reversed(list(self._runs.keys())))[0:limit]
+            # return newest first (dicts keep insertion order and iterate in reverse)
+            return list(islice(reversed(self._runs), max(0, limit)))
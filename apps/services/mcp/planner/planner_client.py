@@ -1,12 +1,37 @@
 from __future__ import annotations
 
-import json
+import functools
 import os
+import threading
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
+from ..llm.json_utils import dumps_bytes, loads
+
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    httpx = None
+
+
+# Shared keep-alive client for planner calls; skips the TCP handshake per plan.
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> Optional[Any]:
+    global _client
+    if httpx is None:
+        return None
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(limits=httpx.Limits(max_connections=8, max_keepalive_connections=8))
+    return _client
+
 
 @dataclass(frozen=True)
 class PlannerClientConfig:
@@ -15,28 +40,31 @@ class PlannerClientConfig:
     timeout_s: float = 5.0
 
 
-class PlannerClient:
-    def __init__(self, cfg: Optional[PlannerClientConfig] = None):
-        if cfg is None:
-            base_url = (
-                os.environ.get("APP_PLANNER_URL")
-            ).rstrip("/")
+@functools.lru_cache(maxsize=1)
+def _default_cfg() -> PlannerClientConfig:
+    """Config from the environment, read once on first use."""
+    base_url = (os.environ.get("APP_PLANNER_URL") or "").strip().rstrip("/")
+
+    # Allow host+port config too
+    if not base_url:
+        host = (os.environ.get("APP_PLANNER_HOST") or "http://127.0.0.1").strip().rstrip("/")
+        port = (os.environ.get("APP_PLANNER_PORT") or "").strip()
+        if port:
+            base_url = f"{host}:{port}".rstrip("/")
 
-            # Allow host+port config too
-            if not base_url:
-                host = os.environ.get("APP_PLANNER_HOST", "http://127.0.0.1").rstrip("/")
-                port = os.environ.get("APP_PLANNER_PORT", "").strip()
-                if port:
-                    base_url = f"{host}:{port}".rstrip("/")
+    token = (os.environ.get("APP_PLANNER_TOKEN") or "").strip()
 
-            token = (
-                os.environ.get("APP_PLANNER_TOKEN")
-            ).strip()
+    timeout_s = float(os.environ.get("APP_PLANNER_TIMEOUT_S") or "5.0")
+    return PlannerClientConfig(base_url=base_url, token=token, timeout_s=timeout_s)
 
-            timeout_s = float(os.environ.get("APP_PLANNER_TIMEOUT_S", "5.0"))
-            cfg = PlannerClientConfig(base_url=base_url, token=token, timeout_s=timeout_s)
 
-        self.cfg = cfg
+class PlannerClient:
+    def __init__(self, cfg: Optional[PlannerClientConfig] = None):
+        self.cfg = cfg or _default_cfg()
+
+        self._headers = {"Content-Type": "application/json"}
+        if self.cfg.token:
+            self._headers["X-Planner-Token"] = self.cfg.token
 
     def plan(
         self,
@@ -54,25 +82,32 @@ class PlannerClient:
         payload: Dict[str, Any] = {"transcript": transcript, "context": context or {}}
 
         url = f"{self.cfg.base_url}/plan"
-        data = json.dumps(payload).encode("utf-8")
-
-        headers = {"Content-Type": "application/json"}
-        if self.cfg.token:
-            headers["X-Planner-Token"] = self.cfg.token
-
-        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
-
-        try:
-            with urllib.request.urlopen(req, timeout=self.cfg.timeout_s) as resp:
-                charset = resp.headers.get_content_charset() or "utf-8"
-                body = resp.read().decode(charset, errors="replace") or "{}"
-        except urllib.error.HTTPError as exc:
-            detail = exc.read().decode("utf-8", errors="replace")
-            return {"ok": False, "error": f"planner HTTP {exc.code}", "detail": detail}
-        except Exception as exc:
-            return {"ok": False, "error": f"planner request failed: {exc}"}
+        data = dumps_bytes(payload)
+
+        headers = self._headers
+
+        client = _get_client()
+        if client is not None:
+            try:
+                resp = client.post(url, content=data, headers=headers, timeout=self.cfg.timeout_s)
+            except Exception as exc:
+                return {"ok": False, "error": f"planner request failed: {exc}"}
+            if resp.status_code >= 400:
+                return {"ok": False, "error": f"planner HTTP {resp.status_code}", "detail": resp.text}
+            body: bytes | str = resp.content or b"{}"
+        else:
+            req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+            try:
+                with urllib.request.urlopen(req, timeout=self.cfg.timeout_s) as r:
+                    body = r.read() or b"{}"
+            except urllib.error.HTTPError as exc:
+                detail = exc.read().decode("utf-8", errors="replace")
+                return {"ok": False, "error": f"planner HTTP {exc.code}", "detail": detail}
+            except Exception as exc:
+                return {"ok": False, "error": f"planner request failed: {exc}"}
 
         try:
-            return json.loads(body)
+            return loads(body)
         except Exception:
-            return {"ok": False, "error": "invalid planner response json", "raw": body}
+            raw = body.decode("utf-8", errors="replace") if isinstance(body, bytes) else body
+            return {"ok": False, "error": "invalid planner response json", "raw": raw}
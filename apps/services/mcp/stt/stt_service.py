@@ -2,16 +2,47 @@ from __future__ import annotations
 
 import json
 import os
-import queue
 import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Optional, Callable
 
+import numpy as np
 from vosk import Model, KaldiRecognizer # type: ignore
 
 
+# Capture block size (frames) and ring depth; a power of two so slot = seq & mask.
+_BLOCKSIZE = 8000
+_RING_SLOTS = 64
+# Ready blocks are coalesced into one AcceptWaveform call at most every
+# _DECODE_INTERVAL_S; audio not yet decoded is capped at _MAX_PENDING_S (oldest trimmed).
+_DECODE_INTERVAL_S = 0.25
+_MAX_PENDING_S = 4.0
+# Energy VAD: blocks whose peak |sample| stays at or below the threshold are not
+# decoded unless a phrase is in progress; the last _VAD_PREROLL_S of quiet audio is
+# kept and prepended when speech starts so the first phoneme is not clipped.
+_VAD_THRESHOLD = 500
+_VAD_PREROLL_S = 0.2
+
+
+def _raise_thread_priority() -> None:
+    """Best effort: SCHED_FIFO for the calling thread, else a lower nice value.
+
+    Both need CAP_SYS_NICE (or an rtprio/nice rlimit); without it capture simply
+    keeps the default priority.
+    """
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(20))
+        return
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.nice(-10)
+    except (AttributeError, OSError):
+        pass
+
+
 @dataclass
 class SttSnapshot:
     ts: float
@@ -30,12 +61,17 @@ class SttService:
         sample_rate: int = 16000,
         device: Optional[int] = None,
         phrase_timeout_s: float = 1.0,
+        vad_threshold: Optional[int] = None,
     ):
         default_model = str(Path(__file__).resolve().parent / "model")
         self.model_path = model_path or os.environ.get("VOSK_MODEL_PATH", default_model)
         self.sample_rate = int(sample_rate)
         self.device = device
         self.phrase_timeout_s = float(phrase_timeout_s)
+        if vad_threshold is None:
+            vad_threshold = int(os.environ.get("STT_VAD_THRESHOLD", _VAD_THRESHOLD))
+        # 0 disables the gate and feeds every block to Vosk.
+        self.vad_threshold = int(vad_threshold)
 
         self._lock = threading.Lock()
         self._stop = threading.Event()
@@ -46,17 +82,42 @@ class SttService:
         self._ts = 0.0
         self._error: Optional[str] = None
 
-        self._audio_q: "queue.Queue[bytes]" = queue.Queue(maxsize=50)
+        # SPSC ring of preallocated int16 blocks: the capture callback copies into
+        # the next slot and bumps _ring_head; _run_loop alone advances _ring_tail.
+        # Each index has a single writer, so no lock. Full -> the new block is dropped.
+        self._ring = np.zeros((_RING_SLOTS, _BLOCKSIZE), dtype=np.int16)
+        self._ring_len = np.zeros(_RING_SLOTS, dtype=np.int64)
+        self._ring_head = 0
+        self._ring_tail = 0
+        self._audio_ev = threading.Event()
 
         self._model: Optional[Model] = None
         self._rec: Optional[KaldiRecognizer] = None
+        # Guards model/recognizer construction only, so a slow load never holds _lock.
+        self._model_lock = threading.Lock()
 
         # Callback hook for events (set by caller)
         self.on_final: Optional[Callable[[str], None]] = None
 
+        # Load the model in the background so the first start_listening doesn't stall.
+        threading.Thread(target=self._preload, daemon=True).start()
+
     # APIs
 
     def start_listening(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return {"ok": True, "msg": "already listening"}
+
+        try:
+            # Returns immediately once _preload has finished; otherwise waits for it.
+            self._ensure_model()
+        except Exception as exc:
+            with self._lock:
+                self._error = str(exc)
+                self._ts = time.time()
+                return {"ok": False, "error": self._error}
+
         with self._lock:
             if self._thread and self._thread.is_alive():
                 return {"ok": True, "msg": "already listening"}
@@ -67,12 +128,6 @@ class SttService:
             self._error = None
             self._ts = time.time()
 
-            try:
-                self._ensure_model()
-            except Exception as exc:
-                self._error = str(exc)
-                return {"ok": False, "error": self._error}
-
             self._thread = threading.Thread(target=self._run_loop, daemon=True)
             self._thread.start()
             return {"ok": True, "msg": "listening started"}
@@ -125,14 +180,31 @@ class SttService:
 
     # Helper functions
 
-    def _ensure_model(self):
-        if self._model is None:
-            if not os.path.isdir(self.model_path):
-                raise RuntimeError(f"Vosk model path not found: {self.model_path}")
-            self._model = Model(self.model_path)
-        if self._rec is None:
-            self._rec = KaldiRecognizer(self._model, self.sample_rate)
-            self._rec.SetWords(False)
+    def _ensure_model(self, warm: bool = False):
+        with self._model_lock:
+            if self._model is None:
+                if not os.path.isdir(self.model_path):
+                    raise RuntimeError(f"Vosk model path not found: {self.model_path}")
+                self._model = Model(self.model_path)
+            if self._rec is None:
+                rec = KaldiRecognizer(self._model, self.sample_rate)
+                if warm:
+                    # 200 ms of silence pages in the decoding graph; then drop that state.
+                    # Done before publishing rec, so _run_loop never shares it mid-warm-up.
+                    rec.AcceptWaveform(bytes(int(self.sample_rate * 2 * 0.2)))
+                    if hasattr(rec, "Reset"):
+                        rec.Reset()
+                    else:
+                        rec = KaldiRecognizer(self._model, self.sample_rate)
+                rec.SetWords(False)
+                self._rec = rec
+
+    def _preload(self):
+        # Errors are left for start_listening to surface when it retries the load.
+        try:
+            self._ensure_model(warm=True)
+        except Exception:
+            pass
 
     def _run_loop(self):
         try:
@@ -143,39 +215,91 @@ class SttService:
             self._start_audio_capture()
 
             last_voice_ts = time.time()
+            # Vosk repeats the same partial for many blocks while the speaker pauses.
+            last_partial_raw = ""
+            pending = bytearray()
+            decode_bytes = int(self.sample_rate * 2 * _DECODE_INTERVAL_S)
+            max_pending = int(self.sample_rate * 2 * _MAX_PENDING_S)
+            last_decode = time.monotonic()
+            vad = self.vad_threshold
+            speaking = vad <= 0
+            last_loud_ts = 0.0
+            preroll = bytearray()
+            preroll_bytes = int(self.sample_rate * 2 * _VAD_PREROLL_S)
             while not self._stop.is_set():
-                try:
-                    chunk = self._audio_q.get(timeout=0.2)
-                except queue.Empty:
-                    # Timeout - check for phrase timeout
-                    if time.time() - last_voice_ts > self.phrase_timeout_s:
-                        with self._lock:
-                            self._partial = ""
+                if self._ring_tail == self._ring_head:
+                    self._audio_ev.wait(0.2)
+                    self._audio_ev.clear()
+                    if self._ring_tail == self._ring_head and not pending and not (speaking and vad > 0):
+                        # Timeout - check for phrase timeout
+                        if time.time() - last_voice_ts > self.phrase_timeout_s:
+                            last_partial_raw = ""
+                            with self._lock:
+                                self._partial = ""
+                        continue
+                while self._ring_tail != self._ring_head:
+                    slot = self._ring_tail & (_RING_SLOTS - 1)
+                    block = self._ring[slot, : self._ring_len[slot]]
+                    if vad > 0 and block.size:
+                        # max/min instead of abs(): no temporary, and no int16 overflow at -32768.
+                        if max(int(block.max()), -int(block.min())) > vad:
+                            last_loud_ts = time.time()
+                            if not speaking:
+                                speaking = True
+                                pending += preroll
+                                preroll.clear()
+                    if speaking:
+                        pending += block.data
+                        last_voice_ts = time.time()
+                    else:
+                        preroll += block.data
+                        if len(preroll) > preroll_bytes:
+                            del preroll[: len(preroll) - preroll_bytes]
+                    # Release the slot only after its samples have been copied out.
+                    self._ring_tail += 1
+
+                # Speech ended: decode what is left and close the utterance.
+                end_of_speech = vad > 0 and speaking and time.time() - last_loud_ts > self.phrase_timeout_s
+
+                if not pending and not end_of_speech:
                     continue
-
-                if not chunk:
+                if len(pending) > max_pending:
+                    del pending[: len(pending) - max_pending]
+
+                now = time.monotonic()
+                if (
+                    not end_of_speech
+                    and len(pending) < decode_bytes
+                    and now - last_decode < _DECODE_INTERVAL_S
+                ):
                     continue
+                chunk = bytes(pending)
+                pending.clear()
+                last_decode = now
 
-                last_voice_ts = time.time()
                 rec = self._rec
                 if rec is None:
                     continue
 
+                if end_of_speech:
+                    speaking = False
+                    last_partial_raw = ""
+                    if chunk and rec.AcceptWaveform(chunk):
+                        self._publish_final(json.loads(rec.Result() or "{}"))
+                    self._publish_final(json.loads(rec.FinalResult() or "{}"))
+                    with self._lock:
+                        self._partial = ""
+                    continue
+
                 if rec.AcceptWaveform(chunk):
-                    res = json.loads(rec.Result() or "{}")
-                    text = (res.get("text") or "").strip()
-                    if text:
-                        with self._lock:
-                            self._final = text
-                            self._partial = ""
-                            self._ts = time.time()
-                        try:
-                            if callable(self.on_final):
-                                self.on_final(text)
-                        except Exception:
-                            pass
+                    last_partial_raw = ""
+                    self._publish_final(json.loads(rec.Result() or "{}"))
                 else:
-                    pres = json.loads(rec.PartialResult() or "{}")
+                    raw = rec.PartialResult()
+                    if raw == last_partial_raw:
+                        continue
+                    last_partial_raw = raw
+                    pres = json.loads(raw or "{}")
                     ptxt = (pres.get("partial") or "").strip()
                     with self._lock:
                         self._partial = ptxt
@@ -191,7 +315,32 @@ class SttService:
             except Exception:
                 pass
 
+    def _publish_final(self, res: Dict[str, Any]) -> None:
+        text = (res.get("text") or "").strip()
+        if not text:
+            return
+        with self._lock:
+            self._final = text
+            self._partial = ""
+            self._ts = time.time()
+        try:
+            if callable(self.on_final):
+                self.on_final(text)
+        except Exception:
+            pass
+
     # Audio capture helpers
+    def _push_audio(self, data: Any) -> None:
+        head = self._ring_head
+        if head - self._ring_tail >= _RING_SLOTS:
+            return  # consumer is a full ring behind; drop this block
+        pcm = np.frombuffer(data, dtype=np.int16)[:_BLOCKSIZE]
+        slot = head & (_RING_SLOTS - 1)
+        self._ring[slot, : len(pcm)] = pcm
+        self._ring_len[slot] = len(pcm)
+        self._ring_head = head + 1
+        self._audio_ev.set()
+
     def _start_audio_capture(self):
         self._audio_backend = None
         self._sd_stream = None
@@ -205,19 +354,17 @@ class SttService:
             def callback(indata, frames, time_info, status):  
                 if self._stop.is_set():
                     return
-                try:
-                    self._audio_q.put_nowait(bytes(indata))
-                except queue.Full:
-                    pass
+                self._push_audio(indata)
 
             self._audio_backend = "sounddevice"
             self._sd = sd
             self._sd_stream = sd.RawInputStream(
                 samplerate=self.sample_rate,
-                blocksize=8000,
+                blocksize=_BLOCKSIZE,
                 device=self.device,
                 dtype="int16",
                 channels=1,
+                latency="low",
                 callback=callback,
             )
             self._sd_stream.start()
@@ -237,20 +384,21 @@ class SttService:
                 channels=1,
                 rate=self.sample_rate,
                 input=True,
-                frames_per_buffer=8000,
+                frames_per_buffer=_BLOCKSIZE,
                 input_device_index=self.device,
             )
 
             def pa_loop():
+                _raise_thread_priority()
                 while not self._stop.is_set():
                     try:
-                        data = self._pa_stream.read(8000, exception_on_overflow=False)
+                        data = self._pa_stream.read(_BLOCKSIZE, exception_on_overflow=False)
                     except Exception:
+                        # Back off: a device that fails every read must not spin a core
+                        # at realtime priority and starve the other threads.
+                        self._stop.wait(0.01)
                         continue
-                    try:
-                        self._audio_q.put_nowait(data)
-                    except queue.Full:
-                        pass
+                    self._push_audio(data)
 
             self._pa_thread = threading.Thread(target=pa_loop, daemon=True)
             self._pa_thread.start()
@@ -2,16 +2,19 @@
 Minimal Pi camera MJPEG streaming using picamera2.
 """
 
+import io
 import os
 import time
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 from core.services import Service
 import cv2
 
 try:
     from picamera2 import Picamera2
+    from picamera2.encoders import MJPEGEncoder
+    from picamera2.outputs import FileOutput
 except Exception:  # pragma: no cover - optional dependency
     Picamera2 = None
 
@@ -24,6 +27,56 @@ HTML = """
 </body>
 </html>
 """
+HTML_BYTES = HTML.encode("utf-8")
+
+_PART_HEADER = b"--FRAME\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+
+
+class StreamOutput(io.BufferedIOBase):
+    """picamera2 FileOutput target: each write() is one complete JPEG from the encoder."""
+
+    def __init__(self):
+        self.frame: bytes | None = None
+        self.condition = threading.Condition()
+
+    def write(self, buf) -> int:
+        with self.condition:
+            self.frame = bytes(buf)
+            self.condition.notify_all()
+        return len(buf)
+
+
+class LatestFrame:
+    """
+    Single slot holding the newest JPEG. One producer publishes; every viewer
+    waits for a sequence number newer than the last frame it sent.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.jpg: bytes | None = None
+        self.seq = 0
+        self.viewers = 0
+
+    def publish(self, jpg: bytes) -> None:
+        with self.cond:
+            self.jpg = jpg
+            self.seq += 1
+            self.cond.notify_all()
+
+    def wait_newer(self, seq: int, timeout: float) -> tuple[int, bytes | None]:
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq != seq, timeout=timeout)
+            return self.seq, self.jpg
+
+    def wait_for_viewers(self) -> None:
+        with self.cond:
+            self.cond.wait_for(lambda: self.viewers > 0)
+
+    def add_viewer(self, delta: int) -> None:
+        with self.cond:
+            self.viewers += delta
+            self.cond.notify_all()
 
 
 def run_cam_streaming_service(video_port: int = 9000, use_local_cam: bool = False):
@@ -52,20 +105,39 @@ def run_cam_streaming_service(video_port: int = 9000, use_local_cam: bool = Fals
             controls={"FrameDurationLimits": (11111, 11111), "NoiseReductionMode": 1},
         )
         picam2.configure(config)
-        picam2.start()
+        # JPEGs come straight from picamera2's MJPEG encoder: no capture_array copy,
+        # no YUV->BGR conversion, no imencode.
+        output = StreamOutput()
+        picam2.start_recording(MJPEGEncoder(), FileOutput(output))
 
         class Capture:
             def read(self):
-                frame = picam2.capture_array()
-                frame = cv2.cvtColor(frame, cv2.COLOR_YUV420p2BGR)
-                ok, jpg = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
-                return ok, jpg.tobytes() if ok else None
+                with output.condition:
+                    if not output.condition.wait(timeout=1.0):
+                        return False, None
+                    frame = output.frame
+                return frame is not None, frame
 
             def release(self):
-                picam2.stop()
+                picam2.stop_recording()
 
         capture = Capture()
 
+    # Capture + encode once per frame no matter how many clients are watching,
+    # and not at all while nobody is.
+    latest = LatestFrame()
+
+    def produce():
+        while True:
+            latest.wait_for_viewers()
+            ok, jpg = capture.read()
+            if not ok or jpg is None:
+                time.sleep(0.01)
+                continue
+            latest.publish(jpg)
+
+    threading.Thread(target=produce, daemon=True).start()
+
     class MJPEGHandler(BaseHTTPRequestHandler):
         def do_GET(self):
             if self.path not in ("/", "/stream.mjpg"):
@@ -75,31 +147,36 @@ def run_cam_streaming_service(video_port: int = 9000, use_local_cam: bool = Fals
             if self.path == "/":
                 self.send_response(200)
                 self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(HTML_BYTES)))
                 self.end_headers()
-                self.wfile.write(HTML.encode())
+                self.wfile.write(HTML_BYTES)
                 return
             self.send_response(200)
             self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=FRAME")
             self.send_header("Cache-Control", "no-store")
             self.end_headers()
+            latest.add_viewer(1)
             try:
+                seq = 0
                 while True:
-                    ok, jpg = capture.read()
-                    if not ok or jpg is None:
-                        time.sleep(0.01)
+                    new_seq, jpg = latest.wait_newer(seq, timeout=1.0)
+                    if new_seq == seq or jpg is None:
                         continue
-                    self.wfile.write(b"--FRAME\r\n")
-                    self.wfile.write(b"Content-Type: image/jpeg\r\n\r\n")
-                    self.wfile.write(jpg)
-                    self.wfile.write(b"\r\n")
+                    seq = new_seq
+                    # wfile is unbuffered: one write per part is one sendall().
+                    self.wfile.write(b"".join((_PART_HEADER % len(jpg), jpg, b"\r\n")))
             except Exception:
                 return
+            finally:
+                latest.add_viewer(-1)
 
         def log_message(self, *args):
             pass
 
     print(f"Video: http://0.0.0.0:{video_port}/stream.mjpg")
-    HTTPServer(("0.0.0.0", video_port), MJPEGHandler).serve_forever()
+    server = ThreadingHTTPServer(("0.0.0.0", video_port), MJPEGHandler)
+    server.daemon_threads = True
+    server.serve_forever()
 
 
 class CamStreamingService(Service):
@@ -1,12 +1,36 @@
+import json
 import os
+import struct
 import threading
 import time
 import sys
 import multiprocessing as mp
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
 
 from core.services import Service
 from states.raspi_states import RaspiStateStore
 
+# macOS snapshot slot: [seq u32][len u32][JSON bytes], rewritten under an mp.Lock.
+# The consumer only copies and parses when seq has moved.
+_SHM_SIZE = 1 << 20
+_SHM_HEADER = struct.Struct("<II")
+
+
+def _dumps_snapshot(snap: dict) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(snap, default=str)
+        except TypeError:
+            pass
+    return json.dumps(snap, separators=(",", ":"), default=str).encode("utf-8")
+
+
 class PiDebugDisplayService(Service):
     """Optional local pygame overlay showing robot status."""
 
@@ -19,7 +43,7 @@ class PiDebugDisplayService(Service):
         self._stop = threading.Event()
         self._proc: mp.Process | None = None
         self._mp_stop: mp.Event | None = None
-        self._mp_queue: mp.Queue | None = None
+        self._shm: shared_memory.SharedMemory | None = None
 
     def start(self):
         if not self._enabled or self._thread:
@@ -43,6 +67,7 @@ class PiDebugDisplayService(Service):
             font = pygame.font.SysFont("Menlo", 16)
             clock = pygame.time.Clock()
             scroll = 0
+            last_key = None
             while not self._stop.is_set():
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
@@ -58,8 +83,11 @@ class PiDebugDisplayService(Service):
                 raspi_state = self._raspi_state.snapshot_dict()
                 visual = raspi_state.get("visual", {})
                 sections = _build_sections(raspi_state, visual)
-                scroll = _render_sections(screen, font, sections, scroll)
-                pygame.display.flip()
+                key = _frame_key(screen, sections, scroll)
+                if key != last_key:
+                    scroll = _render_sections(screen, font, sections, scroll)
+                    pygame.display.flip()
+                    last_key = key
                 clock.tick(10)
             pygame.quit()
 
@@ -77,31 +105,56 @@ class PiDebugDisplayService(Service):
             self._stop.set()
             self._thread.join(timeout=1.0)
             self._thread = None
+        if self._shm:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except Exception:
+                pass
+            self._shm = None
         self._stop.clear()
 
     def _start_macos_display(self):
         if self._proc:
             return
 
-        def producer(stop_evt: threading.Event, queue: mp.Queue):
+        def producer(stop_evt: threading.Event, shm: shared_memory.SharedMemory, lock):
+            seq = 0
+            last = b""
+            last_version = -1
             while not stop_evt.is_set():
                 try:
-                    queue.put(self._raspi_state.snapshot_dict(), timeout=0.1)
+                    # Version first: a write racing the snapshot just shows up next round.
+                    version = self._raspi_state.version()
+                    if version == last_version:
+                        time.sleep(0.5)
+                        continue
+                    last_version = version
+                    data = _dumps_snapshot(self._raspi_state.snapshot_dict())
+                    if data != last and _SHM_HEADER.size + len(data) <= shm.size:
+                        seq += 1
+                        with lock:
+                            shm.buf[_SHM_HEADER.size : _SHM_HEADER.size + len(data)] = data
+                            _SHM_HEADER.pack_into(shm.buf, 0, seq, len(data))
+                        last = data
                 except Exception:
                     pass
                 time.sleep(0.5)
 
         self._stop.clear()
         self._mp_stop = mp.Event()
-        self._mp_queue = mp.Queue()
-        prod_thread = threading.Thread(target=producer, args=(self._stop, self._mp_queue), daemon=True)
+        self._shm = shared_memory.SharedMemory(create=True, size=_SHM_SIZE)
+        shm_lock = mp.Lock()
+        prod_thread = threading.Thread(target=producer, args=(self._stop, self._shm, shm_lock), daemon=True)
         prod_thread.start()
         self._thread = prod_thread
-        self._proc = mp.Process(target=_mp_pygame_consumer, args=(self._mp_stop, self._mp_queue), daemon=True)
+        self._proc = mp.Process(
+            target=_mp_pygame_consumer, args=(self._mp_stop, self._shm.name, shm_lock), daemon=True
+        )
         self._proc.start()
 
 
-def _mp_pygame_consumer(stop_evt: mp.Event, queue: mp.Queue):
+def _mp_pygame_consumer(stop_evt: mp.Event, shm_name: str, shm_lock):
     """Run the pygame display loop in a separate process (macOS-friendly)."""
     try:
         import pygame
@@ -109,40 +162,73 @@ def _mp_pygame_consumer(stop_evt: mp.Event, queue: mp.Queue):
         print("[pi_robot] pygame not available; debug window disabled.")
         return
 
+    shm = shared_memory.SharedMemory(name=shm_name)
+
     pygame.init()
     screen = pygame.display.set_mode((800, 480), pygame.RESIZABLE)
     pygame.display.set_caption("Pi Robot Debug")
     font = pygame.font.SysFont("Menlo", 16)
-    clock = pygame.time.Clock()
     latest = {}
+    last_seq = 0
     scroll = 0
+    last_key = None
+    dirty = True
     while not stop_evt.is_set():
-        try:
-            while True:
-                latest = queue.get_nowait()
-        except Exception:
-            pass
-        for event in pygame.event.get():
+        seq, _ = _SHM_HEADER.unpack_from(shm.buf, 0)
+        if seq != last_seq:
+            with shm_lock:
+                seq, n = _SHM_HEADER.unpack_from(shm.buf, 0)
+                data = bytes(shm.buf[_SHM_HEADER.size : _SHM_HEADER.size + n])
+            try:
+                latest = orjson.loads(data) if orjson is not None else json.loads(data)
+                dirty = True
+            except Exception:
+                pass
+            last_seq = seq
+        # Block for up to 100 ms on input, then take whatever else is queued.
+        events = [pygame.event.wait(100)]
+        events.extend(pygame.event.get())
+        for event in events:
             if event.type == pygame.QUIT:
                 stop_evt.set()
                 break
             if event.type == pygame.VIDEORESIZE:
                 screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                dirty = True
+            if event.type == pygame.VIDEOEXPOSE:
+                last_key = None
+                dirty = True
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 4:
                     scroll = min(scroll + 30, 0)
+                    dirty = True
                 elif event.button == 5:
                     scroll -= 30
+                    dirty = True
+        if not dirty:
+            continue
+        dirty = False
         raspi_state = latest or {}
         visual = raspi_state.get("visual", {})
         sections = _build_sections(raspi_state, visual)
-        scroll = _render_sections(screen, font, sections, scroll)
-        pygame.display.flip()
-        clock.tick(10)
+        key = _frame_key(screen, sections, scroll)
+        if key != last_key:
+            scroll = _render_sections(screen, font, sections, scroll)
+            pygame.display.flip()
+            last_key = key
     pygame.quit()
+    shm.close()
 
 
-def _wrap_text(text: str, font, max_width: int) -> list[str]:
+# Rasterized lines and wrap results are memoized: the state changes every ~0.5s
+# while the loop runs at 10 FPS, so most frames reuse every surface.
+@lru_cache(maxsize=512)
+def _render_text(font, text: str, color: tuple[int, int, int]):
+    return font.render(text, True, color)
+
+
+@lru_cache(maxsize=1024)
+def _wrap_text(text: str, font, max_width: int) -> tuple[str, ...]:
     words = text.split()
     lines: list[str] = []
     curr = ""
@@ -156,7 +242,12 @@ def _wrap_text(text: str, font, max_width: int) -> list[str]:
             curr = word
     if curr:
         lines.append(curr)
-    return lines
+    return tuple(lines)
+
+
+def _frame_key(screen, sections: list[tuple[str, list[str]]], scroll: int) -> tuple:
+    """Everything a frame depends on; an unchanged key means skip the redraw."""
+    return (screen.get_size(), scroll, tuple((title, tuple(map(str, items))) for title, items in sections))
 
 
 def _build_sections(raspi_state: dict, visual: dict) -> list[tuple[str, list[str]]]:
@@ -192,12 +283,12 @@ def _render_sections(screen, font, sections: list[tuple[str, list[str]]], scroll
     header_color = (180, 220, 255)
     text_color = (240, 240, 240)
     for title, items in sections:
-        header = font.render(title, True, header_color)
+        header = _render_text(font, title, header_color)
         screen.blit(header, (10, y))
         y += 20
         for item in items:
             for wrapped in _wrap_text(str(item), font, max_width=max_w):
-                surf = font.render(f"• {wrapped}", True, text_color)
+                surf = _render_text(font, f"• {wrapped}", text_color)
                 screen.blit(surf, (20, y))
                 y += 20
         y += 6
@@ -90,89 +90,137 @@ class EyeTransform:
 
         return blink_scale * curious_scale
 
+    # The shake envelopes are zero whenever their timers are at rest (value == 1),
+    # which is almost every frame, so the sin() terms are only evaluated while shaking.
     @property
     def offset_x(self):
-        shake_offset = (self.shake_timer.value - 1) ** 4 * math.sin(
-            self.shake_frequency_x * 2 * math.pi * (self.time + self.shake_seed_left)) * self.shake_amplitude_x
-        refuse_shake_offset = (1 - ease_in_out_power(abs(self.refuse_shake_timer.value - 0.5) / 0.5,
-                                                     2)) * 32 * math.sin(
-            10 * 2 * math.pi * self.time)
-
-        return shake_offset + self.__current_offset_x + refuse_shake_offset
+        offset = self.__current_offset_x
+        shake_env = (self.shake_timer.value - 1) ** 4
+        if shake_env:
+            offset += shake_env * math.sin(
+                self.shake_frequency_x * 2 * math.pi * (self.time + self.shake_seed_left)) * self.shake_amplitude_x
+        refuse_env = 1 - ease_in_out_power(abs(self.refuse_shake_timer.value - 0.5) / 0.5, 2)
+        if refuse_env:
+            offset += refuse_env * 32 * math.sin(10 * 2 * math.pi * self.time)
+        return offset
 
     @property
     def offset_y(self):
-        shake_offset = (self.shake_timer.value - 1) ** 4 * math.sin(
-            self.shake_frequency_y * 2 * math.pi * (self.time + self.shake_seed_right)) * self.shake_amplitude_y
-        return shake_offset + self.__current_offset_y
+        offset = self.__current_offset_y
+        shake_env = (self.shake_timer.value - 1) ** 4
+        if shake_env:
+            offset += shake_env * math.sin(
+                self.shake_frequency_y * 2 * math.pi * (self.time + self.shake_seed_right)) * self.shake_amplitude_y
+        return offset
+
+
+# Base sclera surfaces keyed by (shape, size, radius). They are shared by both eyes and
+# across mode changes, and are only ever read: draw() scales into a new surface.
+_SCLERA_CACHE: dict[tuple, pygame.Surface] = {}
+
+
+def _sclera(shape: str, size, radius) -> pygame.Surface:
+    key = (shape, tuple(size), radius)
+    surf = _SCLERA_CACHE.get(key)
+    if surf is None:
+        # create a surface with per-pixel alpha, fully transparent
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 0))
+        if shape == "circle":
+            # draw a white circle (the sclera) so it shows up on a black LCD background
+            pygame.draw.circle(surf, (255, 255, 255, 255), (radius, radius), radius)
+        else:
+            # draw a white rounded rectangle (the sclera) so it shows up on a black LCD background
+            pygame.draw.rect(surf, (255, 255, 255, 255), surf.get_rect(), border_radius=radius)
+        _SCLERA_CACHE[key] = surf
+    return surf
 
 
 class Eye:
     def __init__(self):
-        # create a surface with per-pixel alpha so rounded shapes and transparency work
-        self.eye_surf = pygame.Surface((36, 36), pygame.SRCALPHA)
+        # (size, corner heights) -> scaled + corner-carved surface from the last draw
+        self._scaled_key = None
+        self._scaled_surf = None
+        self._scaled_opaque = None
         # default rounded rectangle + pupil
-        self.apply_rounded_rectangle(10)
+        self.apply_rounded_rectangle(10, (36, 36))
         self.transform = EyeTransform()
 
-    def apply_rounded_rectangle(self, radius: int):
-        # clear to fully transparent
-        self.eye_surf.fill((0, 0, 0, 0))
-        # draw a white rounded rectangle (the sclera) so it shows up on a black LCD background
-        pygame.draw.rect(self.eye_surf, (255, 255, 255, 255), self.eye_surf.get_rect(), border_radius=radius)
+    def apply_rounded_rectangle(self, radius: int, size=None):
+        self.eye_surf = _sclera("rect", size or self.eye_surf.get_size(), radius)
+        self._scaled_key = None
 
-    def apply_circle(self, radius):
-        # clear to fully transparent
-        self.eye_surf.fill((0, 0, 0, 0))
-        # draw a white circle (the sclera) so it shows up on a black LCD background
-        pygame.draw.circle(self.eye_surf, (255, 255, 255, 255), (radius, radius), radius)
+    def apply_circle(self, radius, size=None):
+        self.eye_surf = _sclera("circle", size or self.eye_surf.get_size(), radius)
+        self._scaled_key = None
 
     def draw(self, lcd: lcd_frame.LCDDisplay, position: tuple[int, int]):
         lcd.surf.fill((0, 0, 0, 255))
 
-        scaled_surf = pygame.transform.scale(
-            self.eye_surf,
-            (
-                round(self.transform.scale_x * self.eye_surf.get_width()),
-                round(self.transform.scale_y * self.eye_surf.get_height())
-            )
+        size = (
+            round(self.transform.scale_x * self.eye_surf.get_width()),
+            round(self.transform.scale_y * self.eye_surf.get_height())
         )
+        # Integer corner heights, as drawn; consecutive frames often round to the same
+        # surface, so the scale + polygon carve is reused until one of these changes.
+        right_corner = round(self.transform.right_corner_height * size[1])
+        left_corner = round(self.transform.left_corner_height * size[1])
+        key = (size, right_corner, left_corner)
+        if key == self._scaled_key:
+            scaled_surf = self._scaled_surf
+            opaque_surf = self._scaled_opaque
+        else:
+            scaled_surf = pygame.transform.scale(self.eye_surf, size)
+
+            pygame.draw.polygon(
+                scaled_surf,
+                (0, 0, 0, 255),
+                [
+                    # top-left
+                    (0, 0),
+                    # top-right
+                    (scaled_surf.get_width() - 1, 0),
+                    # bottom-right (uses right corner height)
+                    (scaled_surf.get_width() - 1, right_corner),
+                    # bottom-left (uses left corner height)
+                    (0, left_corner),
+                ],
 
-        pygame.draw.polygon(
-            scaled_surf,
-            (0, 0, 0, 255),
-            [
-                # top-left
-                (0, 0),
-                # top-right
-                (scaled_surf.get_width() - 1, 0),
-                # bottom-right (uses right corner height)
-                (scaled_surf.get_width() - 1, round(self.transform.right_corner_height * scaled_surf.get_height())),
-                # bottom-left (uses left corner height)
-                (0, round(self.transform.left_corner_height * scaled_surf.get_height())),
-            ],
-
-        )
-
-        lcd.surf.blit(scaled_surf, (
-            round(position[0] - scaled_surf.get_width() / 2 + self.transform.offset_x),
-            round(position[1] - scaled_surf.get_height() / 2 + self.transform.offset_y)
-        ))
+            )
+            # The LCD was just cleared to black and transparent pixels are (0, 0, 0, 0),
+            # so an alpha-less copy in the LCD's format blits identically on the plain
+            # opaque path. convert(surface) needs no display mode, unlike convert().
+            opaque_surf = scaled_surf.convert(lcd.surf)
+            self._scaled_key = key
+            self._scaled_surf = scaled_surf
+            self._scaled_opaque = opaque_surf
+
+        # Offsets are computed once; every blit for this LCD goes out in one blits() call.
+        left = position[0] - scaled_surf.get_width() / 2 + self.transform.offset_x
+        top = position[1] - scaled_surf.get_height() / 2 + self.transform.offset_y
+        blit_seq = [(opaque_surf, (round(left), round(top)))]
 
         # Draw scaled surf from bottom to top for happy expression (controlled by happy_transition)
         happy_height = round(self.transform.happy_transition * scaled_surf.get_height() * 0.2)
         if happy_height > 0:
             # should inverse color and use multiply blend mode
-            inverted_surf = pygame.Surface((scaled_surf.get_width(), happy_height), pygame.SRCALPHA)
-            for x in range(scaled_surf.get_width()):
-                for y in range(happy_height):
-                    r, g, b, a = scaled_surf.get_at((x, scaled_surf.get_height() - happy_height + y))
-                    inverted_surf.set_at((x, y), (255 - r, 255 - g, 255 - b, a))
-            lcd.surf.blit(inverted_surf, (
-                round(position[0] - scaled_surf.get_width() / 2 + self.transform.offset_x),
-                round(position[
-                          1] - scaled_surf.get_height() / 2 + self.transform.offset_y + scaled_surf.get_height() - happy_height)
-            ))
+            strip = scaled_surf.subsurface(
+                (0, scaled_surf.get_height() - happy_height, scaled_surf.get_width(), happy_height)
+            )
+            # rgb = 255 - rgb via a subtractive blit onto opaque white
+            inverted_surf = pygame.Surface(strip.get_size(), pygame.SRCALPHA)
+            inverted_surf.fill((255, 255, 255, 255))
+            inverted_surf.blit(strip, (0, 0), special_flags=pygame.BLEND_RGB_SUB)
+            # then carry the strip's alpha over: (255, 255, 255, a) min-blended in
+            alpha_mask = strip.copy()
+            alpha_mask.fill((255, 255, 255, 0), special_flags=pygame.BLEND_RGB_MAX)
+            inverted_surf.blit(alpha_mask, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
+            blit_seq.append((inverted_surf, (
+                round(left),
+                round(top + scaled_surf.get_height() - happy_height)
+            )))
+
+        lcd.surf.blits(blit_seq, doreturn=False)
 
     def tick(self, dt: float):
         # advance the transform (blink) timer so blinks animate over time
@@ -1,5 +1,3 @@
-import pygame
-
 from apps.services.pi.eye_animations_lib.eye import Eye
 import  apps.services.pi.eye_animations_lib.lcd_frame as lcd_frame
 import random
@@ -32,17 +30,13 @@ class Eyes:
         self.next_blink_time = random.random() * 5 + 1.5
 
     def apply_rounded_rectangle(self, width: float, height: float, radius: int):
-        self.left_eye.eye_surf = pygame.Surface((width, height), pygame.SRCALPHA)
-        self.right_eye.eye_surf = pygame.Surface((width, height), pygame.SRCALPHA)
-        self.left_eye.apply_rounded_rectangle(radius)
-        self.right_eye.apply_rounded_rectangle(radius)
+        self.left_eye.apply_rounded_rectangle(radius, (width, height))
+        self.right_eye.apply_rounded_rectangle(radius, (width, height))
 
     def apply_circle(self, radius: int):
         diameter = radius * 2
-        self.left_eye.eye_surf = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
-        self.right_eye.eye_surf = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
-        self.left_eye.apply_circle(radius)
-        self.right_eye.apply_circle(radius)
+        self.left_eye.apply_circle(radius, (diameter, diameter))
+        self.right_eye.apply_circle(radius, (diameter, diameter))
 
     def shake_refuse(self):
         self.left_eye.transform.refuse_shake_timer.reset()
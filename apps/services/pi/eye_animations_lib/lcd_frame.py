@@ -14,18 +14,14 @@ class LCDDisplay:
         framed_height = self.surf.get_height() * pixel_side_length + frame_thickness * 2
         frame_surface = pygame.Surface((framed_width, framed_height))
         frame_surface.fill((50, 50, 50))  # Frame color
-        for y in range(self.surf.get_height()):
-            for x in range(self.surf.get_width()):
-                color = self.surf.get_at((x, y))
-                if color[0] > 32 or color[1] > 32 or color[2] > 32:
-                    color = (255, 255, 255)
-                else:
-                    color = (0, 0, 0)
-                rect = pygame.Rect(
-                    frame_thickness + x * pixel_side_length,
-                    frame_thickness + y * pixel_side_length,
-                    pixel_side_length,
-                    pixel_side_length,
-                )
-                pygame.draw.rect(frame_surface, color, rect)
+        # "Lit" = any channel above 32: mask the dark pixels (all channels < 33), invert,
+        # render as white-on-black and upscale with nearest-neighbour scaling.
+        lit = pygame.mask.from_threshold(self.surf, (0, 0, 0, 255), (33, 33, 33, 255))
+        lit.invert()
+        pixels = lit.to_surface(setcolor=(255, 255, 255), unsetcolor=(0, 0, 0))
+        pixels = pygame.transform.scale(
+            pixels,
+            (self.surf.get_width() * pixel_side_length, self.surf.get_height() * pixel_side_length),
+        )
+        frame_surface.blit(pixels, (frame_thickness, frame_thickness))
         return frame_surface
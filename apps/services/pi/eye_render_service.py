@@ -156,17 +156,24 @@ class EyeRenderService(Service):
             eyes.auto_blink = True
             eyes.apply_rounded_rectangle(48, 48, 12)
 
-            last_tick_time = time.time()
+            # Fixed-step loop on an absolute monotonic schedule: the sleep only covers
+            # what is left of the frame, so render time doesn't stretch the period and
+            # dt stays constant. A frame that runs past its slot resyncs rather than
+            # bursting to catch up.
+            dt = 1 / 60
+            next_frame = time.monotonic()
             next_random_movement = PlainFaceMovement(eyes)
 
             while not self._stop.is_set():
-                now = time.time()
-                dt = now - last_tick_time
-                last_tick_time = now
                 eyes.tick(dt)
                 eyes.render()
                 bot.eyes.update_from_surfaces(left_lcd.surf, right_lcd.surf)
-                time.sleep(1 / 60)
+                next_frame += dt
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_frame = time.monotonic()
 
                 next_random_movement.duration -= dt
                 if next_random_movement.duration <= 0:
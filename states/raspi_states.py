@@ -18,6 +18,7 @@ class TaskManager:
         self._queue: list[dict] = []
         self.current: dict | None = None
         self._lock = threading.Lock()
+        self.version = 0  # bumped on every mutation
 
     def enqueue(self, task: dict) -> bool:
         if not isinstance(task, dict):
@@ -26,6 +27,7 @@ class TaskManager:
             return False
         with self._lock:
             self._queue.append(task)
+            self.version += 1
         return True
 
     def try_next(self) -> dict | None:
@@ -35,16 +37,19 @@ class TaskManager:
             if not self._queue:
                 return None
             self.current = self._queue.pop(0)
+            self.version += 1
             return self.current
 
     def finish_current(self):
         with self._lock:
             self.current = None
+            self.version += 1
 
     def clear(self):
         with self._lock:
             self._queue.clear()
             self.current = None
+            self.version += 1
 
     def snapshot(self) -> dict:
         with self._lock:
@@ -146,6 +151,11 @@ class RaspiStateStore:
     _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
     task_manager: TaskManager = field(default_factory=TaskManager)
     max_events: int = 2000
+    _version: int = field(default=0, repr=False)
+
+    def version(self) -> int:
+        """Monotonic counter that moves whenever a snapshot could differ."""
+        return self._version + self.task_manager.version
 
     def snapshot(self) -> RaspiState:
         """Return a shallow copy of the current state (events/movement cloned)."""
@@ -177,6 +187,7 @@ class RaspiStateStore:
 
     def log_event(self, kind: str, **data) -> Event:
         with self._lock:
+            self._version += 1
             evt = self._state.log_event(kind, **data)
             if self.max_events and len(self._state.events) > self.max_events:
                 self._state.events = self._state.events[-self.max_events :]
@@ -184,6 +195,7 @@ class RaspiStateStore:
 
     def set_pi_status(self, status: Dict[str, Any]) -> Dict[str, Any]:
         with self._lock:
+            self._version += 1
             self._state.set_pi_status(status)
             return dict(self._state.pi_status)
 
@@ -194,18 +206,22 @@ class RaspiStateStore:
         turn: Optional[float] = None,
     ) -> MovementState:
         with self._lock:
+            self._version += 1
             return self._state.set_movement(speed=speed, turn=turn)
 
     def set_visual_state(self, visual: Dict[str, Any]) -> Dict[str, Any]:
         with self._lock:
+            self._version += 1
             return self._state.set_visual(visual)
 
     def set_controller_state(self, controller: Dict[str, Any]) -> Dict[str, Any]:
         with self._lock:
+            self._version += 1
             return self._state.set_controller(controller)
 
     def set_robot_state(self, state: str | PiRobotState) -> PiRobotState:
         with self._lock:
+            self._version += 1
             return self._state.set_robot_state(state)
 
     def get_robot_state(self) -> PiRobotState:
@@ -214,6 +230,7 @@ class RaspiStateStore:
 
     def set_cpu_temp(self, temp_c: float) -> float:
         with self._lock:
+            self._version += 1
             try:
                 status = dict(self._state.pi_status)
                 status["cpu_temp"] = float(temp_c)
@@ -295,6 +312,7 @@ class RaspiStateStore:
         if not isinstance(snapshot, dict):
             return
         with self._lock:
+            self._version += 1
             try:
                 # Restore pi_status and robot_state
                 pi_status = snapshot.get("pi_status", {})